@@ -0,0 +1,57 @@
+"""
+Measures Gemini caption latency against the size of the image sent.
+
+Usage:
+    python benchmarks/caption_latency.py photo.jpg [--sizes 384 512 768 1024 1536] [--repeats 3]
+
+Requires GEMINI_API_KEY. Each size is captioned `repeats` times and the
+median latency is reported together with the upload size.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from lifelens.ingestion.image_processor import prepare_caption_image, caption_image
+
+def main():
+    parser = argparse.ArgumentParser(description="Caption latency vs. input size")
+    parser.add_argument("image")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[384, 512, 768, 1024, 1536])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        original_bytes = f.read()
+
+    with Image.open(io.BytesIO(original_bytes)) as image:
+        original_side = max(image.size)
+
+    print(f"Original: {original_side}px longest side, {len(original_bytes) / 1024:.0f} KB")
+    print(f"{'max side':>9} {'upload KB':>10} {'prep ms':>9} {'caption ms':>11}")
+
+    for size in sorted(args.sizes) + [original_side]:
+        prep_times, caption_times = [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            with Image.open(io.BytesIO(original_bytes)) as image:
+                image.draft("RGB", (size, size))
+                jpeg_bytes = prepare_caption_image(image, max_side=size)
+            prep_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            caption_image(jpeg_bytes)
+            caption_times.append(time.perf_counter() - start)
+
+        print(
+            f"{size:>9} {len(jpeg_bytes) / 1024:>10.0f} "
+            f"{statistics.median(prep_times) * 1000:>9.0f} {statistics.median(caption_times) * 1000:>11.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Checks the temporal parser against a table of phrases and measures parse time.
+
+Usage:
+    python benchmarks/time_parser.py [--iterations 2000]
+
+Every phrase is resolved relative to a fixed reference time (Wednesday
+2024-05-15 10:30 in America/New_York, patient birthday August 21st).
+Mismatches are listed and make the script exit non-zero.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from zoneinfo import ZoneInfo
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lifelens.retrieval.time_parser import parse_time_range, parse_time_filter
+
+TIMEZONE = "America/New_York"
+NOW = datetime.datetime(2024, 5, 15, 10, 30, tzinfo=ZoneInfo(TIMEZONE))
+BIRTHDAY = "1948-08-21"
+
+# phrase -> (start, end) as local "YYYY-MM-DD HH:MM", None for an open end,
+# or None if the phrase should not produce a filter
+PHRASES = {
+    "What did I eat today?": ("2024-05-15 00:00", "2024-05-16 00:00"),
+    "Who visited yesterday?": ("2024-05-14 00:00", "2024-05-15 00:00"),
+    "What did I do yesterday evening?": ("2024-05-14 17:00", "2024-05-14 21:00"),
+    "What did we have for dinner last night?": ("2024-05-14 17:00", "2024-05-15 05:00"),
+    "What happened this morning?": ("2024-05-15 05:00", "2024-05-15 12:00"),
+    "the day before yesterday": ("2024-05-13 00:00", "2024-05-14 00:00"),
+    "Photos from last week": ("2024-05-06 00:00", "2024-05-13 00:00"),
+    "anything this week?": ("2024-05-13 00:00", "2024-05-20 00:00"),
+    "What did I do in the past week?": ("2024-05-08 00:00", "2024-05-16 00:00"),
+    "notes from the last 3 days": ("2024-05-12 00:00", "2024-05-16 00:00"),
+    "over the past few weeks": ("2024-04-24 00:00", "2024-05-16 00:00"),
+    "two weeks ago": ("2024-04-29 00:00", "2024-05-06 00:00"),
+    "3 days ago": ("2024-05-12 00:00", "2024-05-13 00:00"),
+    "a month ago": ("2024-04-01 00:00", "2024-05-01 00:00"),
+    "a couple of years ago": ("2022-01-01 00:00", "2023-01-01 00:00"),
+    "last month": ("2024-04-01 00:00", "2024-05-01 00:00"),
+    "last year": ("2023-01-01 00:00", "2024-01-01 00:00"),
+    "What did I do last March?": ("2024-03-01 00:00", "2024-04-01 00:00"),
+    "last May": ("2023-05-01 00:00", "2023-06-01 00:00"),
+    "in June": ("2023-06-01 00:00", "2023-07-01 00:00"),
+    "in March of 2019": ("2019-03-01 00:00", "2019-04-01 00:00"),
+    "March 5th, 2019": ("2019-03-05 00:00", "2019-03-06 00:00"),
+    "on the 4th of July": ("2023-07-04 00:00", "2023-07-05 00:00"),
+    "on 2021-10-02": ("2021-10-02 00:00", "2021-10-03 00:00"),
+    "Trips in 2019": ("2019-01-01 00:00", "2020-01-01 00:00"),
+    "songs from the 60s": ("1960-01-01 00:00", "1970-01-01 00:00"),
+    "What did I do last Sunday morning?": ("2024-05-12 05:00", "2024-05-12 12:00"),
+    "on Wednesday": ("2024-05-15 00:00", "2024-05-16 00:00"),
+    "last Wednesday": ("2024-05-08 00:00", "2024-05-09 00:00"),
+    "Friday afternoon": ("2024-05-10 12:00", "2024-05-10 17:00"),
+    "last weekend": ("2024-05-11 00:00", "2024-05-13 00:00"),
+    "What did we do last Christmas?": ("2023-12-25 00:00", "2023-12-26 00:00"),
+    "New Year's Eve 2019": ("2019-12-31 00:00", "2020-01-01 00:00"),
+    "on my birthday in 2019": ("2019-08-21 00:00", "2019-08-22 00:00"),
+    "my last birthday": ("2023-08-21 00:00", "2023-08-22 00:00"),
+    "last summer": ("2023-06-01 00:00", "2023-09-01 00:00"),
+    "this spring": ("2024-03-01 00:00", "2024-06-01 00:00"),
+    "in the winter of 2020": ("2020-12-01 00:00", "2021-03-01 00:00"),
+    "between March and May": ("2024-03-01 00:00", "2024-06-01 00:00"),
+    "from 2018 to 2020": ("2018-01-01 00:00", "2021-01-01 00:00"),
+    "since last Christmas": ("2023-12-25 00:00", None),
+    "before 2010": (None, "2010-01-01 00:00"),
+    "after lunch yesterday": ("2024-05-14 00:00", "2024-05-15 00:00"),
+    "Have I seen Aunt Priya recently?": ("2024-04-15 00:00", "2024-05-16 00:00"),
+    "between 2 and 5 years ago": ("2019-01-01 00:00", "2023-01-01 00:00"),
+    "2 to 3 weeks ago": ("2024-04-22 00:00", "2024-05-06 00:00"),
+    "photos from 2000": ("2000-01-01 00:00", "2001-01-01 00:00"),
+    "What did I do during 2015?": ("2015-01-01 00:00", "2016-01-01 00:00"),
+    "Who is my grandson?": None,
+    "Did I fall in the garden?": None,
+    "May I see the photos of the beach?": None,
+    "Where did I put my glasses?": None,
+    "I have 2000 photos of the kids": None,
+    "Did I walk 1950 steps?": None,
+    "on 2024-02-30": None,
+    "in 2024-02-30": None,
+    "what did I do 3000 years ago": None,
+    "photos from 5000000 days ago": None,
+    "the last 99999 years": None,
+    "between 2 and 3000 years ago": None,
+}
+
+def _format(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value else None
+
+def check_phrases() -> int:
+    failures = 0
+    for phrase, expected in PHRASES.items():
+        resolved = parse_time_range(phrase, timezone=TIMEZONE, now=NOW, birthday=BIRTHDAY)
+        actual = tuple(_format(value) for value in resolved) if resolved else None
+        if actual != expected:
+            failures += 1
+            print(f"FAIL {phrase!r}: expected {expected}, got {actual}")
+    print(f"{len(PHRASES) - failures}/{len(PHRASES)} phrases resolved as expected")
+    return failures
+
+def benchmark(iterations: int):
+    phrases = list(PHRASES)
+    timed = [
+        ("all phrases", phrases),
+        ("no time expression", ["Where did I put my glasses?", "Who is my grandson?"]),
+    ]
+    for label, sample in timed:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for phrase in sample:
+                parse_time_filter(phrase, timezone=TIMEZONE, now=NOW, birthday=BIRTHDAY)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>20}: {elapsed / (iterations * len(sample)) * 1e6:.1f} µs per query")
+
+def main():
+    parser = argparse.ArgumentParser(description="Temporal parser phrase table and micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = check_phrases()
+    benchmark(args.iterations)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 import streamlit as st
 import os
 import sys
+import datetime
 
 # Add the project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import Auth
-from lifelens.auth.users import authenticate, initialize_default_users, get_all_patients
+from lifelens.auth.users import authenticate, initialize_default_users, get_all_patients, get_patient_profile
 from lifelens.auth.session import (
     init_session, login, logout, is_logged_in, 
     get_current_user, get_active_patient_id, set_active_patient, has_dashboard_access
@@ -113,17 +114,19 @@ if user["role"] != "patient":
     st.stop()
 
 # Import Modules (after login)
-from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.config import QDRANT_COLLECTION_NAME, SEARCH_MODES, SEARCH_MODE, CONTEXT_CANDIDATES
+from lifelens.qdrant.filters import patient_memories_filter
 from lifelens.qdrant.client import get_qdrant_client
 from lifelens.qdrant.schema import create_collection_if_not_exists
-from lifelens.ingestion.image_processor import process_image
-from lifelens.ingestion.audio_processor import process_audio
 from lifelens.ingestion.text_processor import process_text
-from lifelens.ingestion.upsert_memory import upsert_memory
-from lifelens.retrieval.search_engine import search_memories
-from lifelens.retrieval.time_parser import parse_time_filter
-from lifelens.retrieval.reasoning import get_answer
-from lifelens.utils.display import display_memory
+from lifelens.ingestion.jobs import get_job_queue, submit_ingest_job
+from lifelens.retrieval.search_engine import search_memories, get_embedding as get_query_embedding
+from lifelens.retrieval.answer_cache import get_answer_cache
+from lifelens.retrieval.time_parser import parse_time_filter, resolve_timezone
+from lifelens.retrieval.reasoning import stream_answer, AnswerStreamError
+from lifelens.retrieval.context_builder import build_context
+from lifelens.utils.display import display_memory, SentenceAudioPlayer
+from lifelens.utils.tts import text_to_speech, warm_up_in_background, reminder_phrase
 from lifelens.utils.logging import setup_logging
 
 # Initialize Logging and DB
@@ -136,6 +139,15 @@ except Exception as e:
     st.error(f"Failed to connect to Qdrant: {e}")
     st.stop()
 
+@st.cache_resource
+def start_tts_warm_up():
+    """
+    Pre-synthesizes saved reminders once per server process.
+    """
+    return warm_up_in_background()
+
+start_tts_warm_up()
+
 # PATIENT SELECTOR (for caretaker/family)
 if user["role"] in ["caretaker", "family"] and not get_active_patient_id():
     st.title("Select Patient")
@@ -155,6 +167,7 @@ if user["role"] in ["caretaker", "family"] and not get_active_patient_id():
 st.sidebar.title(f"LifeLens 🧠")
 st.sidebar.markdown(f"**{user['full_name']}** ({user['role'].title()})")
 st.sidebar.markdown(f"*Patient: {get_active_patient_id()}*")
+
 st.sidebar.markdown("---")
 
 if st.sidebar.button("🚪 Logout"):
@@ -170,8 +183,12 @@ reminders = load_reminders()
 if reminders:
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔔 Reminders")
-    for r in reminders:
+    for idx, r in enumerate(reminders):
         st.sidebar.warning(f"**{r.get('task')}**\n\n*{r.get('time')}*")
+        if st.sidebar.button("🔊 Read aloud", key=f"reminder_tts_{idx}"):
+            reminder_audio = text_to_speech(reminder_phrase(r))
+            if reminder_audio:
+                st.sidebar.audio(reminder_audio, format='audio/mp3', autoplay=True)
 
 # AI Prompts Section
 from lifelens.utils.ai_prompts import generate_ai_prompts
@@ -182,7 +199,7 @@ try:
         limit=10,
         with_payload=True,
         with_vectors=False,
-        scroll_filter={"must": [{"key": "patient_id", "match": {"value": active_patient_id}}]}
+        scroll_filter=patient_memories_filter(active_patient_id)
     )[0]
     
     recent_memories = [p.payload for p in recent_results]
@@ -204,6 +221,10 @@ tab1, tab2, tab3 = st.tabs(["Remember This 📥", "Ask LifeLens 💬", "Memory L
 # Get active patient ID for filtering
 active_patient_id = get_active_patient_id()
 
+# Background ingestion jobs submitted in this session
+if "ingest_jobs" not in st.session_state:
+    st.session_state.ingest_jobs = []
+
 # --- TAB 1: MEMORY INGESTION ---
 with tab1:
     st.header("Store a New Memory")
@@ -260,28 +281,28 @@ with tab1:
             is_milestone = st.checkbox("🎉 Mark as a Milestone / Achievement", help="Checking this will highlight the memory in the family portal milestones tab")
             
             if st.button("Save Image Memory"):
-                with st.spinner("Processing image..."):
-                    try:
-                        data = process_image(image_input)
-                        
-                        # Add person tags to data
-                        if person_tags:
-                            data['person_tags'] = person_tags
-                        
-                        # Add location
-                        if 'img_location' in st.session_state and st.session_state.img_location:
-                            loc = st.session_state.img_location
-                            data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
-                        
-                        # Add patient_id
-                        data['patient_id'] = active_patient_id
-                        if is_milestone:
-                            data['category'] = "Achievement"
-                        
-                        upsert_memory(client, "image", data)
-                        st.success("Image memory saved successfully!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                try:
+                    data = {}
+                    
+                    # Add person tags to data
+                    if person_tags:
+                        data['person_tags'] = person_tags
+                    
+                    # Add location
+                    if 'img_location' in st.session_state and st.session_state.img_location:
+                        loc = st.session_state.img_location
+                        data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
+                    
+                    # Add patient_id
+                    data['patient_id'] = active_patient_id
+                    if is_milestone:
+                        data['category'] = "Achievement"
+                    
+                    job_id = submit_ingest_job(client, "image", data, upload=image_input)
+                    st.session_state.ingest_jobs.append(job_id)
+                    st.success("Image memory is being saved. You can keep using LifeLens.")
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
     elif ingest_type == "Audio":
         uploaded_file = st.file_uploader("Upload Audio", type=['wav', 'mp3', 'm4a'])
@@ -323,25 +344,24 @@ with tab1:
             is_milestone_audio = st.checkbox("🎉 Mark as a Milestone / Achievement", key="ms_audio", help="Checking this will highlight the memory in the family portal milestones tab")
             
             if st.button("Save Audio Memory"):
-                with st.spinner("Transcribing and saving..."):
-                    try:
-                        data = process_audio(audio_file)
-                        st.info(f"Transcript: {data['transcript']}")
-                        
-                        # Add location
-                        if 'audio_location' in st.session_state and st.session_state.audio_location:
-                            loc = st.session_state.audio_location
-                            data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
-                        
-                        # Add patient_id
-                        data['patient_id'] = active_patient_id
-                        if is_milestone_audio:
-                            data['category'] = "Achievement"
-                        
-                        upsert_memory(client, "audio", data)
-                        st.success("Audio memory saved successfully!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                try:
+                    data = {}
+                    
+                    # Add location
+                    if 'audio_location' in st.session_state and st.session_state.audio_location:
+                        loc = st.session_state.audio_location
+                        data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
+                    
+                    # Add patient_id
+                    data['patient_id'] = active_patient_id
+                    if is_milestone_audio:
+                        data['category'] = "Achievement"
+                    
+                    job_id = submit_ingest_job(client, "audio", data, upload=audio_file)
+                    st.session_state.ingest_jobs.append(job_id)
+                    st.success("Audio memory is being transcribed and saved in the background.")
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
     elif ingest_type == "Text":
         text_content = st.text_area("Write a Note")
@@ -378,32 +398,56 @@ with tab1:
         
         if st.button("Save Note"):
             if text_content:
-                with st.spinner("Saving note..."):
-                    try:
-                        data = process_text(text_content)
-                        # Check for Reminder
-                        from lifelens.utils.reminders import extract_reminder, save_reminder
-                        reminder = extract_reminder(data['content'])
-                        if reminder:
-                            save_reminder(reminder)
-                            st.toast(f"🔔 Reminder set: {reminder['task']}")
-                        
-                        # Add location
-                        if 'text_location' in st.session_state and st.session_state.text_location:
-                            loc = st.session_state.text_location
-                            data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
-                        
-                        # Add patient_id
-                        data['patient_id'] = active_patient_id
-                        if is_milestone_text:
-                            data['category'] = "Achievement"
-                        
-                        upsert_memory(client, "text", data)
-                        st.success("Note saved successfully!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                try:
+                    # Validate before queueing
+                    process_text(text_content)
+                    data = {}
+                    
+                    # Add location
+                    if 'text_location' in st.session_state and st.session_state.text_location:
+                        loc = st.session_state.text_location
+                        data['location'] = {"lat": loc['lat'], "lon": loc['lon'], "name": loc['display_name']}
+                    
+                    # Add patient_id
+                    data['patient_id'] = active_patient_id
+                    if is_milestone_text:
+                        data['category'] = "Achievement"
+                    
+                    job_id = submit_ingest_job(client, "text", data, text=text_content)
+                    st.session_state.ingest_jobs.append(job_id)
+                    st.success("Note is being saved.")
+                except Exception as e:
+                    st.error(f"Error: {e}")
             else:
                 st.warning("Please write something first.")
+    
+    # Background save status (job IDs are kept in session state across reruns)
+    if st.session_state.ingest_jobs:
+        st.markdown("---")
+        st.subheader("⏳ Recent Saves")
+        st.button("🔄 Refresh Status", key="refresh_jobs")
+        
+        job_queue = get_job_queue(client)
+        status_icons = {"queued": "🕒", "running": "⚙️", "retrying": "🔁", "done": "✅", "failed": "❌"}
+        
+        for job_id in reversed(st.session_state.ingest_jobs[-10:]):
+            job = job_queue.get(job_id)
+            if not job:
+                continue
+            
+            icon = status_icons.get(job["status"], "⚪")
+            st.write(f"{icon} **{job['kind'].title()} memory** - {job['status'].title()}")
+            
+            result = job["result"] or {}
+            if job["status"] == "done":
+                if result.get("duplicate"):
+                    st.caption("This memory was already saved, so it was not stored again.")
+                if result.get("transcript"):
+                    st.caption(f"Transcript: {result['transcript']}")
+                if result.get("reminder"):
+                    st.caption(f"🔔 Reminder set: {result['reminder']['task']}")
+            elif job["error"]:
+                st.caption(f"Error: {job['error']}")
 
 # --- TAB 2: RETRIEVAL & REASONING ---
 with tab2:
@@ -433,6 +477,22 @@ with tab2:
         
         with col3:
             date_range = st.date_input("Date Range", [])
+        
+        col4, col5 = st.columns(2)
+        
+        with col4:
+            filter_category = st.multiselect("Category", ["Achievement", "Event", "Milestone", "Family Gathering", "Other"])
+        
+        with col5:
+            filter_people = st.text_input("People", placeholder="e.g., Aunt Priya, John")
+        
+        search_mode = st.radio(
+            "Search Mode",
+            SEARCH_MODES,
+            index=SEARCH_MODES.index(SEARCH_MODE),
+            format_func=lambda mode: {"hybrid": "Smart (meaning + keywords)", "dense": "Meaning", "keyword": "Exact words"}[mode],
+            horizontal=True
+        )
     
     # Text or Voice Query
     query = st.chat_input("Ask about your memories...")
@@ -446,54 +506,102 @@ with tab2:
         st.chat_message("user").write(query)
         
         with st.spinner("Thinking..."):
-            # 1. Parse Time Filters
-            time_filters = parse_time_filter(query)
+            # 1. Parse Time Filters (in the patient's time zone), combined with the Advanced Filters
+            profile = get_patient_profile(active_patient_id)
+            patient_tz = resolve_timezone(profile["timezone"])
+            search_filters = parse_time_filter(query, timezone=patient_tz, birthday=profile["birthday"]) or {}
+            if len(date_range) == 2:
+                # An explicit date range overrides times mentioned in the question
+                range_start = datetime.datetime.combine(date_range[0], datetime.time.min, tzinfo=patient_tz)
+                range_end = datetime.datetime.combine(date_range[1] + datetime.timedelta(days=1), datetime.time.min, tzinfo=patient_tz)
+                search_filters["timestamp"] = {"gte": int(range_start.timestamp()), "lt": int(range_end.timestamp())}
+            search_filters.update({
+                "types": filter_type,
+                "sentiments": filter_mood,
+                "categories": filter_category,
+                "people": filter_people
+            })
             
-            # 2. Retrieve Memories (filtered by patient_id)
-            memories = search_memories(client, query, filters=time_filters, patient_id=active_patient_id)
+            # 2. Retrieve Memories (filtered by patient_id and the filters above)
+            candidates = search_memories(client, query, filters=search_filters, top_k=CONTEXT_CANDIDATES,
+                                         patient_id=active_patient_id, mode=search_mode)
             
-            # 3. Generate Answer
-            answer = get_answer(query, memories)
+            # Keep only the memories that clearly match, within the prompt token budget
+            # (fused and keyword scores only encode rank, so score cutoffs apply to dense search only)
+            memories = build_context(query, candidates, cosine_scores=search_mode == "dense")
             
-            st.chat_message("assistant").write(answer)
-
-            # TTS Playback
-            from lifelens.utils.tts import text_to_speech
+        # 3. Reuse the answer to a near-identical question over the same memories,
+        #    or stream a new one, speaking each sentence as soon as it is complete
+        answer_cache = get_answer_cache()
+        memory_ids = [mem["id"] for mem in memories]
+        query_vector = get_query_embedding(query) if search_mode != "keyword" else None
+        cached = answer_cache.get(active_patient_id, query, memory_ids, vector=query_vector)
+        
+        from lifelens.utils.tts import SentenceSpeaker
+        speaker = SentenceSpeaker()
+        player = None
+        stream_state = {"error": None}
+        
+        with st.chat_message("assistant"):
+            if cached:
+                st.write(cached["answer"])
+                if cached["audio"]:
+                    st.audio(cached["audio"], format='audio/mp3', autoplay=True)
+            else:
+                player = SentenceAudioPlayer(speaker)
+                
+                def answer_tokens():
+                    streamed = False
+                    try:
+                        for delta in stream_answer(query, memories):
+                            speaker.feed(delta)
+                            player.poll()
+                            streamed = True
+                            yield delta
+                    except AnswerStreamError as e:
+                        # Shown, but never spoken or cached
+                        stream_state["error"] = str(e)
+                        yield f"\n\n{e}" if streamed else str(e)
+                        return
+                    speaker.finish()
+                
+                answer = st.write_stream(answer_tokens())
+        
+        # 4. Show Evidence
+        with st.expander("View Retrieved Memories (Evidence)"):
+            if memories:
+                # Related memories for all results: in-memory index plus one batched similarity query
+                from lifelens.utils.memory_graph import related_for_results
+                related_by_id = related_for_results(client, active_patient_id, memories, limit=3)
+                
+                for mem in memories:
+                    display_memory(mem, client)
+                    
+                    # Show related memories
+                    related = related_by_id.get(mem.get("id"), [])
+                    
+                    if related:
+                        st.markdown("**🔗 Related Memories:**")
+                        for rel in related:
+                            summary = rel['memory']['summary']
+                            st.caption(f"• {rel['reason']}" + (f": {summary}" if summary else ""))
+            else:
+                st.write("No relevant memories found.")
+        
+        # TTS Playback: the rest of the answer is queued in the browser
+        # to follow the first sentence
+        if player and stream_state["error"]:
+            # A partial answer: stop speaking it and do not cache it
+            player.stop()
+        elif player:
+            audio_bytes = None
             try:
-                with st.spinner("Speaking..."):
-                    audio_bytes = text_to_speech(answer)
-                    if audio_bytes:
-                        st.audio(audio_bytes, format='audio/mp3', start_time=0)
+                player.finish()
+                audio_bytes = speaker.audio()
             except Exception:
                 pass
             
-            # 4. Show Evidence
-            with st.expander("View Retrieved Memories (Evidence)"):
-                if memories:
-                    for mem in memories:
-                        display_memory(mem)
-                        
-                        # Show related memories
-                        from lifelens.utils.memory_graph import find_related_memories
-                        
-                        # Fetch all memories for relationship detection
-                        all_results = client.scroll(
-                            collection_name=QDRANT_COLLECTION_NAME,
-                            limit=100,
-                            with_payload=True,
-                            with_vectors=False,
-                            scroll_filter={"must": [{"key": "patient_id", "match": {"value": active_patient_id}}]}
-                        )[0]
-                        all_memories = [p.payload for p in all_results]
-                        
-                        related = find_related_memories(all_memories, mem)
-                        
-                        if related:
-                            st.markdown("**🔗 Related Memories:**")
-                            for rel in related[:3]:  # Show top 3
-                                st.caption(f"• {rel['reason']}")
-                else:
-                    st.write("No relevant memories found.")
+            answer_cache.put(active_patient_id, query, memory_ids, answer, audio=audio_bytes, vector=query_vector)
 
 # --- TAB 3: MEMORY LANE ---
 with tab3:
@@ -506,7 +614,7 @@ with tab3:
             limit=20,
             with_payload=True,
             with_vectors=False,
-            scroll_filter={"must": [{"key": "patient_id", "match": {"value": active_patient_id}}]}
+            scroll_filter=patient_memories_filter(active_patient_id)
         )[0]
         
         # Sort by timestamp descending
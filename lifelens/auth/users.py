@@ -83,6 +83,22 @@ def get_all_patients():
     
     return patients
 
+def get_patient_profile(patient_id):
+    """
+    Get optional per-patient settings: IANA "timezone" and "birthday"
+    ("YYYY-MM-DD" or "MM-DD"), as stored on the patient's user record.
+    """
+    users = load_users()
+    
+    for data in users.values():
+        if data["role"] == "patient" and data["patient_id"] == patient_id:
+            return {
+                "timezone": data.get("timezone"),
+                "birthday": data.get("birthday")
+            }
+    
+    return {"timezone": None, "birthday": None}
+
 def initialize_default_users():
     """Create default users if none exist."""
     users = load_users()
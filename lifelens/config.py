@@ -10,10 +10,144 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Paths
+PROCESS_DIR = "processed_data"
+
+# Embedding Providers
+# "gemini" calls the Gemini API; "fastembed" runs an ONNX model locally on CPU.
+EMBEDDING_PROVIDERS = {
+    "gemini": {"model": "models/text-embedding-004", "dimension": 768, "batch_size": 100},
+    "fastembed": {"model": "BAAI/bge-small-en-v1.5", "dimension": 384, "batch_size": 64}
+}
+EMBEDDING_PROVIDER = os.getenv("LIFELENS_EMBEDDING_PROVIDER", "gemini")
+if EMBEDDING_PROVIDER not in EMBEDDING_PROVIDERS:
+    raise ValueError(f"Unknown LIFELENS_EMBEDDING_PROVIDER: {EMBEDDING_PROVIDER}")
+EMBEDDING_MODEL = EMBEDDING_PROVIDERS[EMBEDDING_PROVIDER]["model"]
+EMBEDDING_BATCH_SIZE = EMBEDDING_PROVIDERS[EMBEDDING_PROVIDER]["batch_size"]
+EMBEDDING_THREADS = int(os.getenv("LIFELENS_EMBEDDING_THREADS", str(os.cpu_count() or 2)))
+FASTEMBED_CACHE_DIR = os.path.join(PROCESS_DIR, "models")
+
 # Service Configuration
-QDRANT_COLLECTION_NAME = "lifelens_memory"
-VECTOR_SIZE = 768  # Gemini text-embedding-004
+QDRANT_COLLECTION_NAME = os.getenv("LIFELENS_COLLECTION", "lifelens_memory")
+VECTOR_SIZE = EMBEDDING_PROVIDERS[EMBEDDING_PROVIDER]["dimension"]
 DISTANCE_METRIC = "Cosine"
 
-# Paths
-PROCESS_DIR = "processed_data"
+# Retrieval
+# Keyword (BM25-style) sparse vectors are stored next to the dense vector.
+# "hybrid" fuses both server-side, "keyword" needs no embedding call, "dense" is vector-only.
+SPARSE_VECTOR_NAME = "bm25"
+SEARCH_MODES = ["hybrid", "dense", "keyword"]
+SEARCH_MODE = os.getenv("LIFELENS_SEARCH_MODE", "hybrid")
+if SEARCH_MODE not in SEARCH_MODES:
+    raise ValueError(f"Unknown LIFELENS_SEARCH_MODE: {SEARCH_MODE}")
+HYBRID_PREFETCH_LIMIT = int(os.getenv("LIFELENS_HYBRID_PREFETCH_LIMIT", "50"))
+# IANA time zone for resolving "yesterday", "last Sunday" etc. when a patient has
+# none set in their profile; unset means the server's local time zone
+DEFAULT_TIMEZONE = os.getenv("LIFELENS_TIMEZONE")
+
+# AI Provider Clients
+# One pooled client per provider, shared by every call site. Calls time out after
+# AI_TIMEOUT_SECONDS (transcription after AI_TRANSCRIPTION_TIMEOUT_SECONDS), 429/5xx
+# and connection errors are retried with jittered exponential backoff, and at most
+# AI_CONCURRENCY[provider] requests are in flight per provider. Timeouts of calls
+# with a longer timeout than AI_TIMEOUT_SECONDS are not retried.
+AI_TIMEOUT_SECONDS = float(os.getenv("LIFELENS_AI_TIMEOUT", "60"))
+AI_TRANSCRIPTION_TIMEOUT_SECONDS = float(os.getenv("LIFELENS_AI_TRANSCRIPTION_TIMEOUT", "300"))
+AI_MAX_RETRIES = int(os.getenv("LIFELENS_AI_MAX_RETRIES", "3"))
+AI_RETRY_BASE_DELAY = 0.5
+AI_RETRY_MAX_DELAY = 10.0
+AI_CONCURRENCY = {
+    "groq": int(os.getenv("LIFELENS_GROQ_CONCURRENCY", "8")),
+    "gemini": int(os.getenv("LIFELENS_GEMINI_CONCURRENCY", "8"))
+}
+
+# Bulk Ingestion
+UPSERT_BATCH_SIZE = int(os.getenv("LIFELENS_UPSERT_BATCH_SIZE", "64"))
+UPSERT_WORKERS = int(os.getenv("LIFELENS_UPSERT_WORKERS", "1"))
+
+# Long notes/transcripts are also indexed as overlapping chunks linked to their memory
+CHUNK_MAX_WORDS = int(os.getenv("LIFELENS_CHUNK_MAX_WORDS", "200"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("LIFELENS_CHUNK_OVERLAP_WORDS", "40"))
+
+# Background Ingestion
+INGEST_JOBS_DB = os.path.join(PROCESS_DIR, "ingest_jobs.sqlite3")
+# Uploads waiting for their job; removed once the job is done or has failed
+INGEST_INPUT_DIR = os.path.join(PROCESS_DIR, "ingest_inputs")
+INGEST_WORKERS = int(os.getenv("LIFELENS_INGEST_WORKERS", "2"))
+INGEST_MAX_ATTEMPTS = 3
+
+# Treat photos with an identical perceptual hash as duplicates of an existing memory
+DEDUP_NEAR_DUPLICATE_PHOTOS = os.getenv("LIFELENS_DEDUP_NEAR_DUPLICATES", "true").lower() == "true"
+
+# Enrichment fan-out: per-stage timeouts in seconds
+ENRICHMENT_TIMEOUTS = {
+    "caption": 60,
+    "renditions": 30,
+    "transcript": 900,
+    "compress": 120,
+    "sentiment": 15,
+    "reminder": 20,
+    "embedding": 30
+}
+
+# Media Storage
+BLOB_STORE_BACKEND = os.getenv("LIFELENS_BLOB_STORE", "local")
+BLOB_STORE_DIR = os.getenv("LIFELENS_BLOB_DIR", os.path.join(PROCESS_DIR, "blobs"))
+
+# Longest side of the reduced copy sent to the vision model for captioning
+CAPTION_MAX_SIDE = int(os.getenv("LIFELENS_CAPTION_MAX_SIDE", "768"))
+
+# Audio is transcoded to a voice-bitrate codec before storage ("opus", "mp3" or "original")
+AUDIO_STORAGE_FORMAT = os.getenv("LIFELENS_AUDIO_FORMAT", "opus")
+AUDIO_STORAGE_BITRATE = "24k"
+
+# Recordings longer than the threshold are split at pauses into segments of at
+# most AUDIO_SEGMENT_MAX_SECONDS and transcribed in parallel
+AUDIO_SEGMENT_THRESHOLD_SECONDS = 600
+AUDIO_SEGMENT_MAX_SECONDS = 300
+AUDIO_TRANSCRIBE_CONCURRENCY = 4
+# Whisper rejects larger uploads; bigger recordings are sent as 16 kHz mono FLAC instead
+AUDIO_UPLOAD_MAX_BYTES = 24 * 1024 * 1024
+
+# Image renditions produced at ingest (the original is always kept as well)
+IMAGE_RENDITIONS = {
+    "thumb": {"max_side": 320, "quality": 75},
+    "display": {"max_side": 1280, "quality": 82}
+}
+
+# Embedding Cache
+EMBEDDING_CACHE_PATH = os.getenv("LIFELENS_EMBEDDING_CACHE", os.path.join(PROCESS_DIR, "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_MEMORY_ITEMS = 4096
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("LIFELENS_QUERY_CACHE_TTL", "3600"))
+
+# Answers (and their speech) are reused for near-identical questions over the same memories
+ANSWER_CACHE_SIMILARITY = float(os.getenv("LIFELENS_ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("LIFELENS_ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_PER_PATIENT = 50
+
+# Answer Context
+# Search returns up to CONTEXT_CANDIDATES hits; score cutoffs decide how many reach the LLM
+CONTEXT_CANDIDATES = 20
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LIFELENS_CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_MAX_MEMORY_TOKENS = 200
+CONTEXT_MIN_SCORE = 0.3                 # score cutoffs apply to cosine scores (dense search) only
+CONTEXT_MIN_RELATIVE_SCORE = 0.4        # fraction of the best hit's score
+CONTEXT_MAX_SCORE_GAP = 0.35            # drop everything after a drop this large (fraction of best score)
+CONTEXT_DUPLICATE_SIMILARITY = 0.8      # word-set overlap above which memories count as duplicates
+
+# Related Memories
+# Per-patient in-memory index; reloaded after this long to pick up writes from other processes
+RELATED_INDEX_REFRESH_SECONDS = int(os.getenv("LIFELENS_RELATED_INDEX_REFRESH", "900"))
+# Minimum cosine similarity for "Similar content" related memories
+RELATED_MIN_SIMILARITY = float(os.getenv("LIFELENS_RELATED_MIN_SIMILARITY", "0.6"))
+
+# Text-to-Speech
+# Streamed answers are spoken sentence by sentence; short fragments are merged
+TTS_WORKERS = 2
+TTS_MIN_SENTENCE_CHARS = 40
+TTS_LANG = "en"
+TTS_TLD = "com"                         # accent: "com" is US English
+# Synthesized speech is cached on disk by (text, voice, speed), least recently played evicted first
+TTS_CACHE_DIR = os.getenv("LIFELENS_TTS_CACHE_DIR", os.path.join(PROCESS_DIR, "tts_cache"))
+TTS_CACHE_MAX_MB = int(os.getenv("LIFELENS_TTS_CACHE_MAX_MB", "200"))
@@ -1,79 +1,250 @@
 import os
-import base64
-import tempfile
+import io
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 from groq import Groq
-from lifelens.config import GROQ_API_KEY
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+from lifelens.config import (
+    GROQ_API_KEY, AUDIO_STORAGE_FORMAT, AUDIO_STORAGE_BITRATE,
+    AUDIO_SEGMENT_THRESHOLD_SECONDS, AUDIO_SEGMENT_MAX_SECONDS, AUDIO_TRANSCRIBE_CONCURRENCY,
+    AUDIO_UPLOAD_MAX_BYTES, AI_TRANSCRIPTION_TIMEOUT_SECONDS
+)
+from lifelens.utils.ai_clients import get_groq_client, call_with_retries
+from lifelens.ingestion.enrichment import run_stages
+from lifelens.ingestion.upsert_memory import get_embedding
+from lifelens.ingestion.dedup import hash_bytes
 
-def process_audio(audio_file):
+# pydub export settings and MIME type for each storage format
+AUDIO_STORAGE_CODECS = {
+    "opus": {"format": "ogg", "codec": "libopus", "mime_type": "audio/ogg"},
+    "mp3": {"format": "mp3", "codec": None, "mime_type": "audio/mpeg"}
+}
+
+def read_audio_upload(audio_file):
+    """
+    Returns (filename, bytes) for an uploaded audio file without touching disk.
+    """
+    filename = getattr(audio_file, "name", None) or "audio.wav"
+    if not os.path.splitext(filename)[1]:
+        filename += ".wav"
+
+    if hasattr(audio_file, "getvalue"):
+        return filename, audio_file.getvalue()
+    audio_file.seek(0)
+    return filename, audio_file.read()
+
+def transcribe_audio(client: Groq, filename: str, audio_bytes: bytes) -> str:
+    """
+    Transcribes in-memory audio with Groq Whisper.
+    The filename is only used by the API to detect the container format.
+    """
+    transcription = call_with_retries(
+        "groq",
+        client.audio.transcriptions.create,
+        file=(filename, audio_bytes),
+        model="whisper-large-v3",
+        response_format="json",
+        language="en",
+        temperature=0.0,
+        timeout=AI_TRANSCRIPTION_TIMEOUT_SECONDS
+    )
+    return transcription.text
+
+def analyze_sentiment(client: Groq, transcript: str) -> str:
+    """
+    Classifies the sentiment of a transcript, falling back to Neutral on failure.
+    """
+    try:
+        chat_completion = call_with_retries(
+            "groq",
+            client.chat.completions.create,
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {"role": "system", "content": "Classify the sentiment of the following text as exactly one of: Happy, Sad, Angry, Confused, Neutral. Return only the word."},
+                {"role": "user", "content": transcript}
+            ],
+            max_tokens=10
+        )
+        return chat_completion.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Sentiment Analysis Failed: {e}")
+        return "Neutral"
+
+def decode_audio(filename: str, audio_bytes: bytes):
+    """
+    Decodes a recording to mono 16 kHz, which is all speech needs.
+    Returns None if decoding is unavailable (e.g. ffmpeg missing).
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    try:
+        segment = AudioSegment.from_file(io.BytesIO(audio_bytes), format=ext.lstrip(".") or None)
+        return segment.set_channels(1).set_frame_rate(16000)
+    except Exception as e:
+        logging.warning(f"Audio decoding failed: {e}")
+        return None
+
+def plan_segments(audio: AudioSegment, max_ms: int, min_silence_ms: int = 700) -> list:
+    """
+    Splits a recording into (start_ms, end_ms) ranges of at most `max_ms`,
+    cutting in the middle of the latest pause in the second half of each
+    window so no word is split in two. Falls back to a hard cut where the
+    window has no such pause.
+    """
+    silences = detect_silence(
+        audio,
+        min_silence_len=min_silence_ms,
+        silence_thresh=audio.dBFS - 16,
+        seek_step=100
+    )
+    cut_points = [(start + end) // 2 for start, end in silences]
+
+    ranges = []
+    start = 0
+    while len(audio) - start > max_ms:
+        candidates = [cut for cut in cut_points if start + max_ms // 2 < cut <= start + max_ms]
+        end = candidates[-1] if candidates else start + max_ms
+        ranges.append((start, end))
+        start = end
+    ranges.append((start, len(audio)))
+    return ranges
+
+def transcribe_segmented(client: Groq, audio: AudioSegment) -> tuple:
+    """
+    Transcribes a long recording as silence-aligned segments with bounded
+    parallelism, then reassembles the transcript in order.
+
+    Returns:
+        (transcript, segments) where segments is a list of
+        {"start_ms", "end_ms", "text"} dicts
+    """
+    ranges = plan_segments(audio, AUDIO_SEGMENT_MAX_SECONDS * 1000)
+
+    def transcribe_range(time_range):
+        start_ms, end_ms = time_range
+        buffered = io.BytesIO()
+        audio[start_ms:end_ms].export(buffered, format="flac")
+        return transcribe_audio(client, f"segment_{start_ms}.flac", buffered.getvalue())
+
+    with ThreadPoolExecutor(max_workers=AUDIO_TRANSCRIBE_CONCURRENCY) as executor:
+        texts = list(executor.map(transcribe_range, ranges))
+
+    segments = [
+        {"start_ms": start_ms, "end_ms": end_ms, "text": text.strip()}
+        for (start_ms, end_ms), text in zip(ranges, texts)
+    ]
+    transcript = " ".join(segment["text"] for segment in segments if segment["text"])
+    logging.info(f"Transcribed {len(audio) / 1000:.0f}s recording in {len(segments)} segments")
+    return transcript, segments
+
+def transcribe_recording(client: Groq, filename: str, audio_bytes: bytes, audio: AudioSegment = None) -> tuple:
+    """
+    Transcribes a recording, splitting it into segments when it is longer
+    than AUDIO_SEGMENT_THRESHOLD_SECONDS. Shorter recordings too large to
+    upload (e.g. uncompressed stereo WAV) are sent as 16 kHz mono FLAC.
+
+    Returns:
+        (transcript, segments or None)
+    """
+    if audio is not None and len(audio) > AUDIO_SEGMENT_THRESHOLD_SECONDS * 1000:
+        return transcribe_segmented(client, audio)
+    if len(audio_bytes) > AUDIO_UPLOAD_MAX_BYTES:
+        if audio is None:
+            raise ValueError(
+                f"Recording is {len(audio_bytes) / 1e6:.0f} MB, over the transcription upload limit, "
+                f"and could not be decoded to compress it (is ffmpeg installed?)"
+            )
+        buffered = io.BytesIO()
+        audio.export(buffered, format="flac")
+        return transcribe_audio(client, "recording.flac", buffered.getvalue()), None
+    return transcribe_audio(client, filename, audio_bytes), None
+
+def compress_audio(filename: str, audio_bytes: bytes, audio: AudioSegment = None):
+    """
+    Transcodes audio to a mono voice-bitrate codec (AUDIO_STORAGE_FORMAT) for storage.
+    If transcoding is unavailable (e.g. ffmpeg missing), the original bytes are kept.
+
+    Args:
+        audio: The already decoded recording, if available
+
+    Returns:
+        (bytes, mime_type)
+    """
+    original_mime = mimetypes.guess_type(filename)[0] or "audio/wav"
+    codec = AUDIO_STORAGE_CODECS.get(AUDIO_STORAGE_FORMAT)
+    if codec is None:
+        return audio_bytes, original_mime
+
+    if audio is None:
+        audio = decode_audio(filename, audio_bytes)
+        if audio is None:
+            return audio_bytes, original_mime
+
+    try:
+        buffered = io.BytesIO()
+        export_args = {"format": codec["format"], "bitrate": AUDIO_STORAGE_BITRATE}
+        if codec["codec"]:
+            export_args["codec"] = codec["codec"]
+        audio.export(buffered, **export_args)
+        compressed = buffered.getvalue()
+    except Exception as e:
+        logging.warning(f"Audio transcoding failed, storing original: {e}")
+        return audio_bytes, original_mime
+
+    if len(compressed) >= len(audio_bytes):
+        return audio_bytes, original_mime
+    return compressed, codec["mime_type"]
+
+def process_audio(audio_file, with_embedding: bool = False):
     """
     Process an uploaded audio file:
-    1. Transcribe using Groq Whisper API (distil-whisper-large-v3-en).
-    2. Return the transcript and base64 encoded audio.
+    1. Transcribe using Groq Whisper API (whisper-large-v3) while the
+       audio is compressed for storage. Long recordings are transcribed
+       as parallel segments whose offsets are returned in "segments".
+    2. Analyze sentiment (and optionally embed the transcript) in parallel.
+    3. Return the transcript, sentiment and compressed audio bytes,
+       plus the transcript "vector" if `with_embedding` is set.
     """
     if not GROQ_API_KEY:
         raise ValueError("GROQ_API_KEY is not set.")
-    
-    client = Groq(api_key=GROQ_API_KEY)
-    
-    # Save to temp file because Groq client needs a file-like object or path
-    # We'll use the file object directly if possible, or save temp if needed.
-    # Streamlit UploadedFile is file-like.
-    
-    # However, Groq python client usually expects a filename or a tuple (filename, file-like)
-    # Let's save to temp to be safe and avoid format issues.
-    
-    # Determine extension
-    ext = ".wav"
-    if hasattr(audio_file, "name"):
-         _, ext = os.path.splitext(audio_file.name)
-         if not ext: ext = ".wav"
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_audio:
-        temp_audio.write(audio_file.getvalue())
-        temp_path = temp_audio.name
+
+    client = get_groq_client()
+    filename, audio_bytes = read_audio_upload(audio_file)
 
     try:
-        with open(temp_path, "rb") as file_obj:
-            transcription = client.audio.transcriptions.create(
-                file=(temp_path, file_obj.read()),
-                model="whisper-large-v3",
-                response_format="json",
-                language="en",
-                temperature=0.0
-            )
-        
-        transcript = transcription.text
-        
-        # Analyze Sentiment
-        sentiment = "Neutral"
-        try:
-            chat_completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "Classify the sentiment of the following text as exactly one of: Happy, Sad, Angry, Confused, Neutral. Return only the word."},
-                    {"role": "user", "content": transcript}
-                ],
-                max_tokens=10
-            )
-            sentiment = chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Sentiment Analysis Failed: {e}")
-
-        # Read back for base64
-        with open(temp_path, "rb") as f:
-            audio_bytes = f.read()
-            audio_str = base64.b64encode(audio_bytes).decode()
-            
-        return {
+        # Decode once; both segmentation and storage transcoding use it
+        audio = decode_audio(filename, audio_bytes)
+
+        first = run_stages({
+            "transcript": lambda: transcribe_recording(client, filename, audio_bytes, audio),
+            "compress": lambda: compress_audio(filename, audio_bytes, audio)
+        }, defaults={"compress": (audio_bytes, mimetypes.guess_type(filename)[0] or "audio/wav")})
+        transcript, segments = first["transcript"]
+        media_bytes, mime_type = first["compress"]
+
+        # Analyze Sentiment (and embed) once the transcript is known
+        second_stages = {"sentiment": lambda: analyze_sentiment(client, transcript)}
+        if with_embedding:
+            second_stages["embedding"] = lambda: get_embedding(transcript)
+        second = run_stages(second_stages, defaults={"sentiment": "Neutral"})
+
+        data = {
             "transcript": transcript,
-            "sentiment": sentiment,
-            "base64": audio_str
+            "sentiment": second["sentiment"],
+            "media_bytes": media_bytes,
+            "mime_type": mime_type,
+            # Hash of the recording as uploaded, not of the transcoded copy
+            "content_hash": hash_bytes(audio_bytes)
         }
+        if segments:
+            data["segments"] = segments
+        if with_embedding:
+            data["vector"] = second["embedding"]
+        return data
 
+    except ValueError:
+        # Bad input: let it through unwrapped so the job is not retried
+        raise
     except Exception as e:
-        raise RuntimeError(f"Processing failed: {e}")
-
-    finally:
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        raise RuntimeError(f"Processing failed: {e}") from e
@@ -0,0 +1,280 @@
+"""
+Bulk importer for photo and voice-note archives.
+
+Usage:
+    python -m lifelens.ingestion.bulk_import PATH --patient-id patient_1
+        [--checkpoint FILE] [--workers N] [--concurrency N] [--batch-size N] [--category NAME]
+
+PATH is a directory or a .zip archive. Images are decoded and resized in a
+process pool, captioning/transcription run with bounded concurrency, and
+results are written with batched upserts. Finished files are recorded in a
+checkpoint file so an interrupted import can be resumed with the same command.
+"""
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from PIL import Image
+from qdrant_client import QdrantClient
+from lifelens.config import UPSERT_BATCH_SIZE, CAPTION_MAX_SIDE, IMAGE_RENDITIONS, DEDUP_NEAR_DUPLICATE_PHOTOS
+from lifelens.ingestion.image_processor import prepare_caption_image, caption_image
+from lifelens.ingestion.audio_processor import process_audio
+from lifelens.ingestion.renditions import make_renditions
+from lifelens.ingestion.upsert_memory import upsert_memories
+from lifelens.ingestion.dedup import hash_bytes, perceptual_hash, find_existing_memory
+from lifelens.utils.blob_store import store_media
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff"}
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".ogg", ".flac", ".aac"}
+
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+EXIF_IFD = 0x8769
+
+def list_sources(path: str) -> list:
+    """
+    Lists importable files in a directory tree or zip archive.
+    Each source is a dict with a stable checkpoint key.
+    """
+    sources = []
+
+    def add(name, size, mtime, **location):
+        ext = os.path.splitext(name)[1].lower()
+        kind = "image" if ext in IMAGE_EXTENSIONS else "audio" if ext in AUDIO_EXTENSIONS else None
+        if kind:
+            sources.append({"key": f"{name}:{size}", "name": name, "kind": kind, "mtime": mtime, **location})
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    add(info.filename, info.file_size, time.mktime(info.date_time + (0, 0, -1)),
+                        archive=path, member=info.filename)
+    else:
+        for root, _, files in os.walk(path):
+            for filename in sorted(files):
+                full_path = os.path.join(root, filename)
+                stat = os.stat(full_path)
+                add(os.path.relpath(full_path, path), stat.st_size, stat.st_mtime, path=full_path)
+
+    return sorted(sources, key=lambda s: s["name"])
+
+def read_source(source: dict) -> bytes:
+    """
+    Reads the bytes of a source file (works in worker processes too).
+    """
+    if "archive" in source:
+        with zipfile.ZipFile(source["archive"]) as archive:
+            return archive.read(source["member"])
+    with open(source["path"], "rb") as f:
+        return f.read()
+
+def _photo_timestamp(image: Image.Image, fallback: float) -> int:
+    exif = image.getexif()
+    taken = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    if taken:
+        try:
+            return int(datetime.strptime(str(taken).strip("\x00 "), "%Y:%m:%d %H:%M:%S").timestamp())
+        except ValueError:
+            pass
+    return int(fallback)
+
+def prepare_image(source: dict) -> dict:
+    """
+    Process-pool stage: decodes an image once, stores the original and its
+    renditions in the blob store and returns the reduced copy for captioning.
+    """
+    original_bytes = read_source(source)
+    image = Image.open(io.BytesIO(original_bytes))
+    mime_type = Image.MIME.get(image.format, "image/jpeg")
+    timestamp = _photo_timestamp(image, source["mtime"])
+
+    largest_side = max([CAPTION_MAX_SIDE] + [spec["max_side"] for spec in IMAGE_RENDITIONS.values()])
+    image.draft("RGB", (largest_side, largest_side))
+
+    media = store_media(original_bytes, mime_type)
+    media["renditions"] = {
+        name: store_media(rendition_bytes, "image/webp")
+        for name, rendition_bytes in make_renditions(image).items()
+    }
+    return {
+        "media": media,
+        "timestamp": timestamp,
+        "caption_jpeg": prepare_caption_image(image),
+        "phash": perceptual_hash(original_bytes)
+    }
+
+def _ingest_source(client: QdrantClient, source: dict, processes: ProcessPoolExecutor, metadata: dict):
+    """
+    Thread-pool stage: runs the network-bound enrichment for one file and
+    returns the (memory_type, data) item for upsert_memories, or
+    ("duplicate", point_id) if the file is already stored for this patient.
+    """
+    source_bytes = read_source(source)
+    content_hash = hash_bytes(source_bytes)
+    existing_id = find_existing_memory(client, metadata["patient_id"], content_hash)
+    if existing_id:
+        return "duplicate", existing_id
+
+    if source["kind"] == "image":
+        prepared = processes.submit(prepare_image, source).result()
+        if DEDUP_NEAR_DUPLICATE_PHOTOS:
+            existing_id = find_existing_memory(client, metadata["patient_id"], content_hash, prepared["phash"])
+            if existing_id:
+                return "duplicate", existing_id
+        data = {
+            "caption": caption_image(prepared["caption_jpeg"]),
+            "media": prepared["media"],
+            "timestamp": prepared["timestamp"],
+            "content_hash": content_hash,
+            "phash": prepared["phash"]
+        }
+    else:
+        upload = io.BytesIO(source_bytes)
+        upload.name = os.path.basename(source["name"])
+        data = process_audio(upload, with_embedding=True)
+        data["timestamp"] = int(source["mtime"])
+
+    data.update(metadata)
+    return source["kind"], data
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_checkpoint(path: str, checkpoint: dict):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+def run_import(client: QdrantClient, path: str, patient_id: str, checkpoint_path: str,
+               workers: int = None, concurrency: int = 4, batch_size: int = UPSERT_BATCH_SIZE,
+               category: str = None) -> dict:
+    """
+    Imports every photo and recording under `path` for a patient.
+
+    Returns:
+        Dict with counts of imported, duplicate, failed and skipped files
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    sources = list_sources(path)
+    pending = [s for s in sources if checkpoint.get(s["key"], {}).get("status") != "done"]
+    skipped = len(sources) - len(pending)
+    logging.info(f"{len(sources)} files found, {skipped} already imported, {len(pending)} to go")
+
+    metadata = {"patient_id": patient_id}
+    if category:
+        metadata["category"] = category
+
+    counts = {"imported": 0, "failed": 0, "skipped": skipped, "duplicates": 0}
+    batch = []
+    start = time.monotonic()
+
+    def flush():
+        results = upsert_memories(client, [item for _, item in batch], batch_size=batch_size)
+        for (source, _), result in zip(batch, results):
+            if result["error"] is None:
+                checkpoint[source["key"]] = {"status": "done", "point_id": result["id"]}
+                counts["imported"] += 1
+            else:
+                checkpoint[source["key"]] = {"status": "failed", "error": str(result["error"])}
+                counts["failed"] += 1
+        save_checkpoint(checkpoint_path, checkpoint)
+        batch.clear()
+
+        processed = counts["imported"] + counts["failed"] + counts["duplicates"]
+        elapsed = time.monotonic() - start
+        logging.info(
+            f"[{processed}/{len(pending)}] {counts['imported']} imported, {counts['duplicates']} duplicates, "
+            f"{counts['failed']} failed, "
+            f"{processed / elapsed:.2f} files/s"
+        )
+
+    # Spawned, not forked: worker processes start lazily from importer threads
+    # while other threads may hold HTTP or logging locks a fork would copy
+    process_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_context) as processes, \
+            ThreadPoolExecutor(max_workers=concurrency) as threads:
+        # A bounded window of files in flight: finished results hold media bytes
+        # until they are upserted, so memory must not grow with the archive size
+        remaining = iter(pending)
+        futures = {}
+
+        def submit_next():
+            source = next(remaining, None)
+            if source is not None:
+                futures[threads.submit(_ingest_source, client, source, processes, metadata)] = source
+
+        for _ in range(concurrency * 2):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            future = next(iter(done))
+            source = futures.pop(future)
+            submit_next()
+            try:
+                kind, item = future.result()
+                if kind == "duplicate":
+                    checkpoint[source["key"]] = {"status": "done", "point_id": item, "duplicate": True}
+                    counts["duplicates"] += 1
+                else:
+                    batch.append((source, (kind, item)))
+            except Exception as e:
+                logging.error(f"Failed to process {source['name']}: {e}")
+                checkpoint[source["key"]] = {"status": "failed", "error": str(e)}
+                counts["failed"] += 1
+
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    elapsed = time.monotonic() - start
+    processed = counts["imported"] + counts["failed"] + counts["duplicates"]
+    logging.info(
+        f"Import finished in {elapsed:.1f}s: {counts['imported']} imported, "
+        f"{counts['duplicates']} duplicates, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped ({processed / elapsed if elapsed else 0:.2f} files/s)"
+    )
+    return counts
+
+def main():
+    from lifelens.qdrant.client import create_qdrant_client
+    from lifelens.qdrant.schema import create_collection_if_not_exists
+    from lifelens.utils.logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="Import a directory or zip archive of photos and voice notes")
+    parser.add_argument("path")
+    parser.add_argument("--patient-id", required=True)
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.import-checkpoint.json)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for image decoding (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent caption/transcription calls")
+    parser.add_argument("--batch-size", type=int, default=UPSERT_BATCH_SIZE)
+    parser.add_argument("--category", help="Category to set on every imported memory")
+    args = parser.parse_args()
+
+    setup_logging()
+    client = create_qdrant_client()
+    create_collection_if_not_exists(client)
+
+    checkpoint_path = args.checkpoint or f"{os.path.abspath(args.path).rstrip(os.sep)}.import-checkpoint.json"
+    run_import(
+        client, args.path, args.patient_id, checkpoint_path,
+        workers=args.workers, concurrency=args.concurrency,
+        batch_size=args.batch_size, category=args.category
+    )
+
+if __name__ == "__main__":
+    main()
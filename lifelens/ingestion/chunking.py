@@ -0,0 +1,33 @@
+from lifelens.config import CHUNK_MAX_WORDS, CHUNK_OVERLAP_WORDS
+
+def chunk_text(text: str, max_words: int = CHUNK_MAX_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> list:
+    """
+    Splits long text into overlapping word windows.
+    Text that fits in one window is not chunked (returns an empty list).
+
+    Returns:
+        List of (first_word_index, chunk_text) tuples
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return []
+
+    step = max_words - overlap_words
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append((start, " ".join(words[start:start + max_words])))
+        if start + max_words >= len(words):
+            break
+    return chunks
+
+def segment_offset(segments: list, word_index: int):
+    """
+    Maps a word index in a segmented transcript back to the start offset
+    (ms) of the segment containing that word.
+    """
+    words_seen = 0
+    for segment in segments:
+        words_seen += len(segment["text"].split())
+        if word_index < words_seen:
+            return segment["start_ms"]
+    return segments[-1]["start_ms"] if segments else None
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import threading
+import uuid
+from contextlib import contextmanager
+from PIL import Image
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.utils.embedding_cache import normalize_text
+
+# Fixed namespace so the same patient + content always maps to the same point ID
+POINT_ID_NAMESPACE = uuid.UUID("5b0f3c1e-8a52-4c1e-9d4e-6f1c2a7b9e30")
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Content hash of media: SHA-256 of the exact uploaded bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text: str) -> str:
+    """
+    Content hash of a note: SHA-256 of the normalized text.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def memory_point_id(patient_id: str, content_hash: str) -> str:
+    """
+    Deterministic point ID, so re-saving the same content overwrites the
+    existing point instead of creating a duplicate.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{patient_id}:{content_hash}"))
+
+def chunk_point_id(parent_id: str, chunk_index: int) -> str:
+    """
+    Deterministic ID of a chunk point, derived from its parent memory's ID.
+    """
+    return str(uuid.uuid5(uuid.UUID(parent_id), f"chunk:{chunk_index}"))
+
+def perceptual_hash(image_bytes: bytes) -> str:
+    """
+    64-bit difference hash (dHash) of a photo as 16 hex characters.
+    Re-encoded or resized copies of the same photo share the same dHash.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # JPEGs decode at 1/8 scale here, which is all a 9x8 hash needs
+        image.draft("L", (64, 64))
+        pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+def find_existing_memory(client: QdrantClient, patient_id: str, content_hash: str, phash: str = None):
+    """
+    Returns the ID of an existing memory with the same content (or, for photos,
+    the same perceptual hash) for this patient, or None.
+    """
+    point_id = memory_point_id(patient_id, content_hash)
+    if client.retrieve(collection_name=QDRANT_COLLECTION_NAME, ids=[point_id], with_payload=False):
+        return point_id
+
+    if phash:
+        points, _ = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=models.Filter(must=[
+                models.FieldCondition(key="patient_id", match=models.MatchValue(value=patient_id)),
+                models.FieldCondition(key="phash", match=models.MatchValue(value=phash))
+            ]),
+            limit=1,
+            with_payload=False,
+            with_vectors=False
+        )
+        if points:
+            return str(points[0].id)
+
+    return None
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+@contextmanager
+def content_lock(key: str):
+    """
+    Serializes concurrent ingestion of the same content within this process,
+    so a double-clicked Save waits for the first job and then finds its point.
+    """
+    with _inflight_lock:
+        lock, users = _inflight.get(key, (threading.Lock(), 0))
+        _inflight[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _inflight_lock:
+            lock, users = _inflight[key]
+            if users == 1:
+                del _inflight[key]
+            else:
+                _inflight[key] = (lock, users - 1)
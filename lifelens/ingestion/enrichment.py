@@ -0,0 +1,55 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from lifelens.config import ENRICHMENT_TIMEOUTS
+
+def run_stages(stages: dict, defaults: dict = None, timeouts: dict = None) -> dict:
+    """
+    Runs independent enrichment stages concurrently, so the total latency
+    is that of the slowest stage rather than the sum of all of them.
+
+    Args:
+        stages: Dict of stage name -> zero-argument callable
+        defaults: Fallback values for optional stages. A stage with a default
+            that fails or times out yields the default; any other stage re-raises.
+        timeouts: Per-stage timeouts in seconds, overriding ENRICHMENT_TIMEOUTS
+
+    Returns:
+        Dict of stage name -> result
+
+    Timeouts are best-effort: a running stage cannot be interrupted, so a timed-out
+    stage is abandoned and its thread lives on until the underlying call returns
+    (bounded by the AI client timeouts). Each call gets its own pool so an
+    abandoned stage never holds a worker that a later job is waiting for.
+    """
+    defaults = defaults or {}
+    timeouts = {**ENRICHMENT_TIMEOUTS, **(timeouts or {})}
+
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="enrich")
+    try:
+        futures = {name: executor.submit(stage) for name, stage in stages.items()}
+
+        results = {}
+        for name, future in futures.items():
+            timeout = timeouts.get(name)
+            remaining = None if timeout is None else max(0.0, start + timeout - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                error = TimeoutError(f"Enrichment stage '{name}' timed out after {timeout}s")
+                if name not in defaults:
+                    raise error
+                logging.warning(f"Enrichment stage '{name}' failed, using default: {error}")
+                results[name] = defaults[name]
+            except Exception as e:
+                if name not in defaults:
+                    raise
+                logging.warning(f"Enrichment stage '{name}' failed, using default: {e}")
+                results[name] = defaults[name]
+    finally:
+        # Don't wait for abandoned stages; their threads exit when their calls return
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.info(f"Enrichment stages {list(stages)} finished in {time.monotonic() - start:.2f}s")
+    return results
@@ -1,44 +1,84 @@
-import google.generativeai as genai
-from lifelens.config import GEMINI_API_KEY
-from PIL import Image
+from lifelens.config import GEMINI_API_KEY, CAPTION_MAX_SIDE, IMAGE_RENDITIONS
+from lifelens.ingestion.renditions import make_renditions
+from lifelens.ingestion.enrichment import run_stages
+from lifelens.ingestion.dedup import hash_bytes, perceptual_hash
+from lifelens.utils.ai_clients import get_gemini_model, gemini_request_options, call_with_retries
+from PIL import Image, ImageOps
 import io
-import base64
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
-    # Handle missing key gracefully or log warning
-    pass
+CAPTION_PROMPT = """Describe this image in detail for a blind person.
+    If there are people in the photo, identify them by their apparent relationship or role (e.g., 'a young woman', 'an elderly man', 'a child').
+    If you can infer names from context clues in the image (text, name tags, etc.), mention them.
+    Be warm and descriptive."""
+
+def read_upload_bytes(uploaded_file) -> bytes:
+    """
+    Returns the raw bytes of an uploaded file (Streamlit UploadedFile, BytesIO or open file).
+    """
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+def prepare_caption_image(image: Image.Image, max_side: int = CAPTION_MAX_SIDE) -> bytes:
+    """
+    Produces the reduced-size JPEG sent to the vision model.
+    Only this copy is resized; the stored original is never touched.
+    """
+    caption_image = ImageOps.exif_transpose(image)
+    if caption_image.mode != "RGB":
+        caption_image = caption_image.convert("RGB")
+    caption_image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    buffered = io.BytesIO()
+    caption_image.save(buffered, format="JPEG", quality=85)
+    return buffered.getvalue()
+
+def caption_image(jpeg_bytes: bytes) -> str:
+    """
+    Generates a caption for a prepared JPEG using Gemini Flash.
+    """
+    response = call_with_retries(
+        "gemini",
+        get_gemini_model('gemini-flash-latest').generate_content,
+        [CAPTION_PROMPT, {"mime_type": "image/jpeg", "data": jpeg_bytes}],
+        request_options=gemini_request_options()
+    )
+    return response.text
 
 def process_image(image_file):
     """
     Process an uploaded image:
-    1. Generate a caption using Gemini Flash.
-    2. Return the caption and base64 encoded image.
+    1. Generate a caption using Gemini Flash from a reduced-size copy,
+       while the WebP renditions are produced in parallel.
+    2. Return the caption, the original bytes (unchanged) and the renditions.
     """
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is not set.")
 
-    # Convert to PIL Image
-    image = Image.open(image_file)
-    
+    original_bytes = read_upload_bytes(image_file)
+
+    image = Image.open(io.BytesIO(original_bytes))
+    mime_type = Image.MIME.get(image.format, "image/jpeg")
+
+    # For JPEGs, let the decoder downscale while decoding; nothing we
+    # derive from the pixels needs more than the largest rendition.
+    largest_side = max([CAPTION_MAX_SIDE] + [spec["max_side"] for spec in IMAGE_RENDITIONS.values()])
+    image.draft("RGB", (largest_side, largest_side))
+    # Decode once here; both stages below only read from the decoded image
+    image.load()
+
     # Generate Caption with Person Identification
-    model = genai.GenerativeModel('gemini-flash-latest')
-    prompt = """Describe this image in detail for a blind person. 
-    If there are people in the photo, identify them by their apparent relationship or role (e.g., 'a young woman', 'an elderly man', 'a child').
-    If you can infer names from context clues in the image (text, name tags, etc.), mention them.
-    Be warm and descriptive."""
-    
-    response = model.generate_content([prompt, image])
-    caption = response.text
-    
-    # Convert to Base64
-    buffered = io.BytesIO()
-    image.save(buffered, format=image.format or "JPEG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
+    stages = run_stages({
+        "caption": lambda: caption_image(prepare_caption_image(image)),
+        "renditions": lambda: make_renditions(image)
+    }, defaults={"renditions": {}})
+
     return {
-        "caption": caption,
-        "base64": img_str
+        "caption": stages["caption"],
+        "media_bytes": original_bytes,
+        "mime_type": mime_type,
+        "renditions": stages["renditions"],
+        "content_hash": hash_bytes(original_bytes),
+        "phash": perceptual_hash(original_bytes)
     }
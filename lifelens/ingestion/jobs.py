@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from qdrant_client import QdrantClient
+from lifelens.config import INGEST_JOBS_DB, INGEST_WORKERS, INGEST_MAX_ATTEMPTS, INGEST_INPUT_DIR
+from lifelens.utils.blob_store import LocalBlobStore
+
+# Uploads are parked here, apart from the media blob store, so they can be
+# removed when their job ends without touching the media of any memory
+_input_store = LocalBlobStore(INGEST_INPUT_DIR)
+
+
+def get_input_store() -> LocalBlobStore:
+    """
+    Returns the store holding uploads of unfinished ingestion jobs.
+    """
+    return _input_store
+
+# Job lifecycle: queued -> running -> done | failed, with retrying in between
+ACTIVE_STATUSES = ("queued", "running", "retrying")
+
+
+class JobQueue:
+    """
+    In-process worker pool for ingestion jobs, backed by a SQLite job table.
+    Jobs are persisted before they run, so their status survives Streamlit
+    reruns and unfinished jobs are picked up again after a restart.
+    """
+
+    def __init__(self, client: QdrantClient, db_path: str, workers: int = 2, max_attempts: int = 3):
+        self.client = client
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT, status TEXT, payload TEXT, result TEXT, "
+            "error TEXT, attempts INTEGER, created_at INTEGER, updated_at INTEGER, input_sha256 TEXT)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "input_sha256" not in columns:
+            # Job tables from before the parked upload had its own column
+            self._db.execute("ALTER TABLE jobs ADD COLUMN input_sha256 TEXT")
+            for job_id, payload in self._db.execute("SELECT id, payload FROM jobs").fetchall():
+                sha256 = json.loads(payload).get("input_sha256")
+                if sha256:
+                    self._db.execute("UPDATE jobs SET input_sha256 = ? WHERE id = ?", (sha256, job_id))
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_input_sha256 ON jobs (input_sha256)")
+        self._db.commit()
+
+        self._resume_unfinished()
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = int(time.time())
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+            self._db.commit()
+
+    def _resume_unfinished(self):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for (job_id,) in rows:
+            logging.info(f"Resuming ingestion job {job_id}")
+            self._update(job_id, status="queued")
+            self._executor.submit(self._run, job_id)
+
+    def submit(self, kind: str, payload: dict, upload_bytes: bytes = None) -> str:
+        """
+        Records a job and schedules it. Returns the job ID immediately.
+        `upload_bytes` are parked in the input store until the job ends.
+        """
+        job_id = str(uuid.uuid4())
+        now = int(time.time())
+        with self._lock:
+            # Under the lock, so a finishing job with the same upload cannot
+            # remove it between storing it and recording this job
+            if upload_bytes is not None:
+                payload["input_sha256"] = _input_store.put(upload_bytes)
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, payload, attempts, created_at, updated_at, input_sha256) "
+                "VALUES (?, ?, 'queued', ?, 0, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now, payload.get("input_sha256"))
+            )
+            self._db.commit()
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _run(self, job_id: str):
+        from lifelens.ingestion.pipeline import JOB_HANDLERS
+
+        with self._lock:
+            row = self._db.execute("SELECT kind, payload, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        kind, payload, attempts = row[0], json.loads(row[1]), row[2] + 1
+        self._update(job_id, status="running", attempts=attempts)
+
+        try:
+            result = JOB_HANDLERS[kind](self.client, payload)
+        except Exception as e:
+            # Bad input (ValueError) will not get better on a retry
+            if isinstance(e, ValueError) or attempts >= self.max_attempts:
+                logging.error(f"Ingestion job {job_id} failed: {e}")
+                self._update(job_id, status="failed", error=str(e))
+                self._release_input(job_id, payload)
+                return
+
+            delay = (2 ** attempts) + random.uniform(0, 1)
+            logging.warning(f"Ingestion job {job_id} attempt {attempts} failed, retrying in {delay:.1f}s: {e}")
+            self._update(job_id, status="retrying", error=str(e))
+            timer = threading.Timer(delay, lambda: self._executor.submit(self._run, job_id))
+            timer.daemon = True
+            timer.start()
+            return
+
+        self._update(job_id, status="done", result=json.dumps(result), error=None)
+        self._release_input(job_id, payload)
+        logging.info(f"Ingestion job {job_id} finished")
+
+    def _release_input(self, job_id: str, payload: dict):
+        """
+        Removes a finished job's parked upload unless another unfinished job
+        (e.g. a double-clicked Save) still needs the same bytes.
+        """
+        sha256 = payload.get("input_sha256")
+        if not sha256:
+            return
+        with self._lock:
+            in_use = self._db.execute(
+                f"SELECT 1 FROM jobs WHERE input_sha256 = ? AND id != ? "
+                f"AND status IN ({','.join('?' * len(ACTIVE_STATUSES))}) LIMIT 1",
+                (sha256, job_id, *ACTIVE_STATUSES)
+            ).fetchone()
+            if not in_use:
+                _input_store.delete(sha256)
+
+    def get(self, job_id: str):
+        """
+        Returns the status of a job as a dict, or None if it is unknown.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "attempts": row[5],
+            "created_at": row[6],
+            "updated_at": row[7]
+        }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(client: QdrantClient) -> JobQueue:
+    """
+    Returns the process-wide ingestion job queue, creating it on first use.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(client, INGEST_JOBS_DB, INGEST_WORKERS, INGEST_MAX_ATTEMPTS)
+    return _queue
+
+
+def submit_ingest_job(client: QdrantClient, kind: str, metadata: dict, upload=None, text: str = None) -> str:
+    """
+    Queues an image, audio or text memory for background ingestion.
+    Uploaded bytes are parked in the input store so the job only carries a reference.
+
+    Args:
+        client: QdrantClient instance
+        kind: 'image', 'audio' or 'text'
+        metadata: Extra fields for the memory (patient_id, location, category, person_tags)
+        upload: Uploaded file for image/audio jobs
+        text: Note content for text jobs
+
+    Returns:
+        Job ID
+    """
+    payload = {"metadata": metadata}
+    if upload is not None:
+        upload_bytes = upload.getvalue() if hasattr(upload, "getvalue") else upload.read()
+        payload["filename"] = getattr(upload, "name", None)
+    else:
+        upload_bytes = None
+    if text is not None:
+        payload["text"] = text
+
+    return get_job_queue(client).submit(kind, payload, upload_bytes=upload_bytes)
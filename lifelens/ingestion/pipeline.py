@@ -0,0 +1,100 @@
+import io
+from qdrant_client import QdrantClient
+from lifelens.config import DEDUP_NEAR_DUPLICATE_PHOTOS
+from lifelens.ingestion.image_processor import process_image
+from lifelens.ingestion.audio_processor import process_audio
+from lifelens.ingestion.text_processor import process_text
+from lifelens.ingestion.upsert_memory import upsert_memory, get_embedding
+from lifelens.ingestion.enrichment import run_stages
+from lifelens.ingestion.dedup import hash_text, perceptual_hash, find_existing_memory, content_lock
+from lifelens.utils.blob_store import get_blob_store
+from lifelens.ingestion.jobs import get_input_store
+
+def _load_upload(payload: dict):
+    """
+    Rebuilds a file-like upload from the bytes parked for the job.
+    """
+    sha256 = payload["input_sha256"]
+    input_store = get_input_store()
+    # Jobs queued before the input store existed parked their upload in the blob store
+    store = input_store if input_store.exists(sha256) else get_blob_store()
+    upload = io.BytesIO(store.get(sha256))
+    if payload.get("filename"):
+        upload.name = payload["filename"]
+    return upload
+
+def ingest_image(client: QdrantClient, payload: dict) -> dict:
+    """
+    Captions and stores an image memory.
+    Skips all work if the same (or a near-identical) photo is already stored.
+    """
+    patient_id = payload["metadata"].get("patient_id", "unknown")
+    # The parked upload is content-addressed, so its key is the content hash
+    content_hash = payload["input_sha256"]
+
+    with content_lock(f"{patient_id}:{content_hash}"):
+        upload = _load_upload(payload)
+        phash = perceptual_hash(upload.getvalue()) if DEDUP_NEAR_DUPLICATE_PHOTOS else None
+        existing_id = find_existing_memory(client, patient_id, content_hash, phash)
+        if existing_id:
+            return {"point_id": existing_id, "duplicate": True}
+
+        data = process_image(upload)
+        data.update(payload["metadata"])
+        point_id = upsert_memory(client, "image", data)
+    return {"point_id": point_id, "caption": data["caption"]}
+
+def ingest_audio(client: QdrantClient, payload: dict) -> dict:
+    """
+    Transcribes, analyzes and stores an audio memory.
+    Sentiment and embedding both run as soon as the transcript is ready.
+    """
+    patient_id = payload["metadata"].get("patient_id", "unknown")
+    content_hash = payload["input_sha256"]
+
+    with content_lock(f"{patient_id}:{content_hash}"):
+        existing_id = find_existing_memory(client, patient_id, content_hash)
+        if existing_id:
+            return {"point_id": existing_id, "duplicate": True}
+
+        data = process_audio(_load_upload(payload), with_embedding=True)
+        data.update(payload["metadata"])
+        point_id = upsert_memory(client, "audio", data)
+    return {"point_id": point_id, "transcript": data["transcript"], "sentiment": data["sentiment"]}
+
+def ingest_text(client: QdrantClient, payload: dict) -> dict:
+    """
+    Stores a text note, saving a reminder if the note contains one.
+    Reminder extraction and embedding run in parallel.
+    """
+    from lifelens.utils.reminders import extract_reminder, save_reminder
+
+    data = process_text(payload["text"])
+    patient_id = payload["metadata"].get("patient_id", "unknown")
+    content_hash = hash_text(data["content"])
+
+    source = f"{patient_id}:{content_hash}"
+    with content_lock(source):
+        existing_id = find_existing_memory(client, patient_id, content_hash)
+        if existing_id:
+            return {"point_id": existing_id, "duplicate": True}
+
+        stages = run_stages({
+            "reminder": lambda: extract_reminder(data["content"]),
+            "embedding": lambda: get_embedding(data["content"])
+        }, defaults={"reminder": None})
+
+        reminder = stages["reminder"]
+        if reminder:
+            save_reminder(reminder, source=source)
+        data["vector"] = stages["embedding"]
+
+        data.update(payload["metadata"])
+        point_id = upsert_memory(client, "text", data)
+    return {"point_id": point_id, "reminder": reminder}
+
+JOB_HANDLERS = {
+    "image": ingest_image,
+    "audio": ingest_audio,
+    "text": ingest_text
+}
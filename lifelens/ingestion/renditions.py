@@ -0,0 +1,27 @@
+import io
+from PIL import Image, ImageOps
+from lifelens.config import IMAGE_RENDITIONS
+
+def make_renditions(image: Image.Image) -> dict:
+    """
+    Produces the downscaled WebP renditions of a photo defined in IMAGE_RENDITIONS.
+    The original is not included; it is stored as uploaded.
+
+    Returns:
+        Dict of rendition name -> WebP bytes
+    """
+    # Apply the EXIF rotation so renditions are displayed upright
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    renditions = {}
+    for name, spec in IMAGE_RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail((spec["max_side"], spec["max_side"]), Image.LANCZOS)
+
+        buffered = io.BytesIO()
+        resized.save(buffered, format="WEBP", quality=spec["quality"], method=4)
+        renditions[name] = buffered.getvalue()
+
+    return renditions
@@ -1,102 +1,310 @@
-import google.generativeai as genai
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from lifelens.config import QDRANT_COLLECTION_NAME, GEMINI_API_KEY
-import uuid
+from lifelens.config import QDRANT_COLLECTION_NAME, UPSERT_BATCH_SIZE, UPSERT_WORKERS, SPARSE_VECTOR_NAME
+from lifelens.qdrant.schema import has_sparse_vectors
+from lifelens.qdrant.filters import normalize_person_tags
+from lifelens.utils.blob_store import store_media
+from lifelens.utils.embedding_cache import get_embedding_cache, embedding_key
+from lifelens.utils.embeddings import get_embedding_provider
+from lifelens.utils.sparse_vectors import sparse_document_vector
+from lifelens.utils.memory_graph import get_related_memory_index
+from lifelens.retrieval.answer_cache import get_answer_cache
+from lifelens.ingestion.dedup import hash_text, memory_point_id, chunk_point_id
+from lifelens.ingestion.chunking import chunk_text, segment_offset
+from concurrent.futures import ThreadPoolExecutor
+import base64
 import time
 import logging
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+def get_embeddings(texts: list) -> list:
+    """
+    Generates document embeddings for many texts with the configured provider,
+    in batches of at most the provider's batch size.
+    Texts already in the embedding cache are not embedded again.
+    """
+    task_type = "retrieval_document"
+    provider = get_embedding_provider()
+    cache = get_embedding_cache()
+    keys = [embedding_key(provider.model_name, task_type, text) for text in texts]
+    vectors = cache.get_many(keys)
+
+    # Embed each distinct missing text once, even if repeated in this call
+    missing = {}
+    for key, text, vector in zip(keys, texts, vectors):
+        if vector is None and key not in missing:
+            missing[key] = text
+
+    missing_keys = list(missing)
+    fresh = {}
+    for start in range(0, len(missing_keys), provider.max_batch_size):
+        batch_keys = missing_keys[start:start + provider.max_batch_size]
+        try:
+            batch_vectors = provider.embed_documents([missing[key] for key in batch_keys])
+        except Exception as e:
+            logging.error(f"Failed to generate embeddings: {e}")
+            raise e
+        cache.put_many(provider.model_name, task_type, batch_keys, batch_vectors)
+        fresh.update(zip(batch_keys, batch_vectors))
+
+    return [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
 
 def get_embedding(text: str):
     """
-    Generates embedding using Gemini API.
+    Generates a document embedding for a single text.
     """
-    try:
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_document",
-            title="Embedding of single text"
-        )
-        return result['embedding']
-    except Exception as e:
-        logging.error(f"Failed to generate embedding: {e}")
-        raise e
+    return get_embeddings([text])[0]
 
-def upsert_memory(client: QdrantClient, memory_type: str, data: dict):
+def point_vector(client: QdrantClient, vector: list, text: str):
     """
-    Upserts a memory item into Qdrant.
-    
-    Args:
-        client: QdrantClient instance
-        memory_type: 'image', 'audio', or 'text'
-        data: Dictionary containing content/caption/transcript and other metadata
+    The vector(s) to store for a point: the dense embedding, plus the keyword
+    sparse vector of its text when the collection supports it.
+    """
+    if has_sparse_vectors(client):
+        return {"": vector, SPARSE_VECTOR_NAME: sparse_document_vector(text)}
+    return vector
+
+def _store_item_media(data: dict, default_mime_type: str) -> dict:
+    """
+    Stores an item's media (and image renditions) in the blob store and returns
+    the payload reference. Accepts an already stored reference ("media"),
+    raw bytes ("media_bytes") or the older base64 string ("base64").
+    """
+    if data.get("media"):
+        return data["media"]
+
+    if data.get("media_bytes") is not None:
+        media_bytes = data["media_bytes"]
+    else:
+        media_bytes = base64.b64decode(data["base64"])
+
+    media = store_media(media_bytes, data.get("mime_type", default_mime_type))
+    if data.get("renditions"):
+        media["renditions"] = {
+            name: store_media(rendition_bytes, "image/webp")
+            for name, rendition_bytes in data["renditions"].items()
+        }
+    return media
+
+def build_payload(memory_type: str, data: dict):
+    """
+    Builds the Qdrant payload for a memory and the text that represents it.
+    Media bytes are written to the blob store as a side effect.
+
+    Returns:
+        (payload, text_to_embed)
     """
-    
-    # Prepare payload and text to embed
     payload = {
         "type": memory_type,
-        "timestamp": int(time.time()),
+        "timestamp": int(data.get("timestamp") or time.time()),
         "patient_id": data.get("patient_id", "unknown")
     }
-    
+
     # Add optional category/milestone flag
     if "category" in data:
         payload["category"] = data["category"]
     elif "is_milestone" in data:
         payload["is_milestone"] = data["is_milestone"]
-    
+
+    # Tagged people, plus a normalized list for filtering
+    if data.get("person_tags"):
+        payload["person_tags"] = data["person_tags"]
+        payload["people"] = normalize_person_tags(data["person_tags"])
+
     text_to_embed = ""
-    
+
     if memory_type == "image":
         payload["caption"] = data["caption"]
-        payload["source_image_base64"] = data["base64"]
-        if "person_tags" in data:
-            payload["person_tags"] = data["person_tags"]
+        payload["media"] = _store_item_media(data, "image/jpeg")
         if "location" in data:
             payload["location"] = data["location"]
         text_to_embed = data["caption"]
-        
+
     elif memory_type == "audio":
         payload["transcript"] = data["transcript"]
-        payload["source_audio_base64"] = data["base64"]
+        payload["media"] = _store_item_media(data, "audio/wav")
         payload["sentiment"] = data.get("sentiment", "Neutral")
+        if data.get("segments"):
+            payload["segments"] = data["segments"]
         if "location" in data:
             payload["location"] = data["location"]
         text_to_embed = data["transcript"]
-        
+
     elif memory_type == "text":
         payload["content"] = data["content"]
         if "location" in data:
             payload["location"] = data["location"]
         text_to_embed = data["content"]
-    
+
+    else:
+        raise ValueError(f"Unknown memory type: {memory_type}")
+
     if not text_to_embed:
         raise ValueError("No text content available to embed.")
 
-    # Generate Embedding using Gemini
-    vector = get_embedding(text_to_embed)
-    
-    # Create Point
-    point_id = str(uuid.uuid4())
-    
-    point = models.PointStruct(
-        id=point_id,
-        vector=vector,
-        payload=payload
-    )
-    
-    # Upsert
+    # Content hash drives the deterministic point ID: exact bytes for media,
+    # normalized text for notes
+    if data.get("content_hash"):
+        payload["content_hash"] = data["content_hash"]
+    elif memory_type == "text":
+        payload["content_hash"] = hash_text(data["content"])
+    else:
+        payload["content_hash"] = payload["media"]["sha256"]
+    if data.get("phash"):
+        payload["phash"] = data["phash"]
+
+    return payload, text_to_embed
+
+# Payload fields copied onto chunk points so filtered searches match them too
+CHUNK_INHERITED_FIELDS = ["type", "timestamp", "patient_id", "category", "is_milestone", "sentiment", "person_tags", "people"]
+
+def build_chunk_points(parent_id: str, payload: dict, text: str) -> list:
+    """
+    Splits a long memory text into overlapping chunks, each stored as its own
+    point linked to the parent memory via `parent_id`.
+
+    Returns:
+        List of {"id", "payload", "text", "vector"} dicts (empty for short texts)
+    """
+    points = []
+    for chunk_index, (word_index, chunk) in enumerate(chunk_text(text)):
+        chunk_payload = {field: payload[field] for field in CHUNK_INHERITED_FIELDS if field in payload}
+        chunk_payload.update({
+            "parent_id": parent_id,
+            "is_chunk": True,
+            "chunk_index": chunk_index,
+            "chunk_text": chunk
+        })
+        # Segmented recordings: remember where in the audio the chunk starts
+        if payload.get("segments"):
+            chunk_payload["start_ms"] = segment_offset(payload["segments"], word_index)
+        points.append({
+            "id": chunk_point_id(parent_id, chunk_index),
+            "payload": chunk_payload,
+            "text": chunk,
+            "vector": None
+        })
+    return points
+
+def _upsert_chunk(client: QdrantClient, chunk: list, results: list):
+    """
+    Embeds and upserts one chunk of prepared entries, recording the outcome
+    of each entry in `results` (indexed by the entry's input position).
+    A memory and its text chunks are always written in the same call.
+    """
     try:
+        # Memories may arrive with a vector computed during enrichment
+        to_embed = [point for entry in chunk for point in entry["points"] if point["vector"] is None]
+        if to_embed:
+            vectors = get_embeddings([point["text"] for point in to_embed])
+            for point, vector in zip(to_embed, vectors):
+                point["vector"] = vector
+
+        points = [
+            models.PointStruct(
+                id=point["id"],
+                vector=point_vector(client, point["vector"], point["text"]),
+                payload=point["payload"]
+            )
+            for entry in chunk
+            for point in entry["points"]
+        ]
         client.upsert(
             collection_name=QDRANT_COLLECTION_NAME,
-            points=[point]
+            points=points
         )
-        logging.info(f"Successfully upserted {memory_type} memory with ID {point_id}")
-        return point_id
+        related_index = get_related_memory_index()
+        answer_cache = get_answer_cache()
+        for entry in chunk:
+            results[entry["index"]] = {"id": entry["id"], "error": None}
+            related_index.add(entry["id"], entry["points"][0]["payload"])
+            answer_cache.invalidate(entry["points"][0]["payload"]["patient_id"])
     except Exception as e:
-        logging.error(f"Failed to upsert memory: {e}")
-        raise e
+        logging.error(f"Failed to upsert {len(chunk)} memories: {e}")
+        for entry in chunk:
+            results[entry["index"]] = {"id": None, "error": e}
+
+def upsert_memories(client: QdrantClient, items: list, batch_size: int = UPSERT_BATCH_SIZE, workers: int = UPSERT_WORKERS):
+    """
+    Upserts many memory items into Qdrant.
+    Embeddings are generated in batched calls and memories are written in
+    chunks of `batch_size`, optionally with several chunks in flight.
+    Long texts are additionally indexed as overlapping chunk points.
+
+    Args:
+        client: QdrantClient instance
+        items: List of (memory_type, data) tuples, as accepted by upsert_memory
+        batch_size: Number of memories per Qdrant upsert call
+        workers: Number of chunks embedded and upserted in parallel
+
+    Returns:
+        List of {"id": point_id or None, "error": exception or None}, in input order
+    """
+    results = [None] * len(items)
+    entries = []
+
+    for index, (memory_type, data) in enumerate(items):
+        try:
+            payload, text_to_embed = build_payload(memory_type, data)
+        except Exception as e:
+            logging.error(f"Failed to prepare {memory_type} memory: {e}")
+            results[index] = {"id": None, "error": e}
+            continue
+
+        point_id = memory_point_id(payload["patient_id"], payload["content_hash"])
+        payload["parent_id"] = point_id
+        entries.append({
+            "index": index,
+            "id": point_id,
+            "points": [{
+                "id": point_id,
+                "payload": payload,
+                "text": text_to_embed,
+                "vector": data.get("vector")
+            }] + build_chunk_points(point_id, payload, text_to_embed)
+        })
+
+    chunks = [entries[start:start + batch_size] for start in range(0, len(entries), batch_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda chunk: _upsert_chunk(client, chunk, results), chunks))
+    else:
+        for chunk in chunks:
+            _upsert_chunk(client, chunk, results)
+
+    succeeded = sum(1 for r in results if r["error"] is None)
+    logging.info(f"Upserted {succeeded}/{len(items)} memories")
+    return results
+
+def upsert_memory(client: QdrantClient, memory_type: str, data: dict):
+    """
+    Upserts a memory item into Qdrant.
+
+    Args:
+        client: QdrantClient instance
+        memory_type: 'image', 'audio', or 'text'
+        data: Dictionary containing content/caption/transcript and other metadata.
+            A precomputed "vector" is used as-is instead of embedding the text.
+    """
+    result = upsert_memories(client, [(memory_type, data)])[0]
+    if result["error"] is not None:
+        raise result["error"]
+
+    logging.info(f"Successfully upserted {memory_type} memory with ID {result['id']}")
+    return result["id"]
+
+def delete_memory(client: QdrantClient, point_id: str, patient_id: str = None):
+    """
+    Deletes a memory together with the chunk points linked to it.
+    Cached answers of `patient_id` (of every patient, if not given) are dropped.
+    """
+    client.delete(
+        collection_name=QDRANT_COLLECTION_NAME,
+        points_selector=models.FilterSelector(filter=models.Filter(should=[
+            models.HasIdCondition(has_id=[point_id]),
+            models.FieldCondition(key="parent_id", match=models.MatchValue(value=str(point_id)))
+        ]))
+    )
+    get_related_memory_index().remove(point_id)
+    get_answer_cache().invalidate(patient_id)
+    logging.info(f"Deleted memory {point_id}")
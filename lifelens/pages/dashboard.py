@@ -8,14 +8,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from lifelens.auth.session import init_session, is_logged_in, get_current_user, get_active_patient_id, has_dashboard_access
 from lifelens.qdrant.client import get_qdrant_client
 from lifelens.ingestion.image_processor import process_image
-from lifelens.ingestion.upsert_memory import upsert_memory
+from lifelens.ingestion.upsert_memory import upsert_memory, delete_memory
 from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.qdrant.filters import patient_memories_filter
 from lifelens.utils.analytics import get_memory_stats, get_activity_dataframe
 from lifelens.utils.export import generate_memory_book_html
 import pandas as pd
 import altair as alt
 from datetime import datetime
-import base64
+from lifelens.utils.blob_store import load_media_bytes
 
 # Page Config
 st.set_page_config(page_title="Caregiver Dashboard", page_icon="🛡️", layout="wide")
@@ -159,13 +160,13 @@ st.subheader("👥 People Directory")
 
 people_photos = {}
 for mem in stats["memories"]:
-    if "person_tags" in mem and "source_image_base64" in mem:
+    if "person_tags" in mem and mem.get("type") == "image":
         tags = [tag.strip() for tag in mem["person_tags"].split(",")]
         for person in tags:
             if person not in people_photos:
                 people_photos[person] = []
             people_photos[person].append({
-                "image": mem["source_image_base64"],
+                "memory": mem,
                 "caption": mem.get("caption", "No caption")[:50]
             })
 
@@ -177,7 +178,9 @@ if people_photos:
             cols = st.columns(3)
             for idx, photo in enumerate(people_photos[person][:6]):  # Limit to 6
                 with cols[idx % 3]:
-                    st.image(base64.b64decode(photo["image"]), use_column_width=True)
+                    image_bytes = load_media_bytes(photo["memory"], rendition="thumb")
+                    if image_bytes:
+                        st.image(image_bytes, use_column_width=True)
                     st.caption(photo["caption"] + "...")
 else:
     st.info("No people tagged yet.")
@@ -401,7 +404,7 @@ scroll_result = client.scroll(
     limit=50,
     with_payload=True,
     with_vectors=False,
-    scroll_filter={"must": [{"key": "patient_id", "match": {"value": patient_id}}]}
+    scroll_filter=patient_memories_filter(patient_id)
 )[0]
 
 if scroll_result:
@@ -431,10 +434,7 @@ if scroll_result:
         with col2:
             if st.button("🗑️ Delete", key=f"del_{point.id}"):
                 try:
-                    client.delete(
-                        collection_name=QDRANT_COLLECTION_NAME,
-                        points_selector=[point.id]
-                    )
+                    delete_memory(client, point.id, patient_id=patient_id)
                     st.success("Deleted!")
                     st.rerun()
                 except Exception as e:
@@ -443,3 +443,46 @@ if scroll_result:
         st.markdown("---")
 else:
     st.info("No memories to manage.")
+
+st.markdown("---")
+
+# === SYSTEM PERFORMANCE ===
+with st.expander("⚙️ System Performance"):
+    from lifelens.retrieval.search_engine import get_query_cache_stats
+    from lifelens.utils.embedding_cache import get_embedding_cache
+
+    query_stats = get_query_cache_stats()
+    st.markdown("**Query Embedding Cache**")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit Rate", f"{query_stats['hit_rate']:.0%}")
+    col2.metric("Hits", query_stats["hits"])
+    col3.metric("Shared In-Flight", query_stats["coalesced"])
+    col4.metric("Misses", query_stats["misses"])
+
+    doc_stats = get_embedding_cache().stats()
+    st.markdown("**Document Embedding Cache**")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit Rate", f"{doc_stats['hit_rate']:.0%}")
+    col2.metric("Memory Hits", doc_stats["memory_hits"])
+    col3.metric("Disk Hits", doc_stats["disk_hits"])
+    col4.metric("Misses", doc_stats["misses"])
+
+    from lifelens.retrieval.answer_cache import get_answer_cache
+
+    answer_stats = get_answer_cache().stats()
+    st.markdown("**Answer Cache**")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit Rate", f"{answer_stats['hit_rate']:.0%}")
+    col2.metric("Hits", answer_stats["hits"])
+    col3.metric("Cached Answers", answer_stats["size"])
+    col4.metric("Invalidations", answer_stats["invalidations"])
+
+    from lifelens.utils.tts_cache import get_speech_cache
+
+    speech_stats = get_speech_cache().stats()
+    st.markdown("**Speech Cache**")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit Rate", f"{speech_stats['hit_rate']:.0%}")
+    col2.metric("Hits", speech_stats["hits"])
+    col3.metric("Size", f"{speech_stats['bytes'] / 1e6:.1f} MB")
+    col4.metric("Evictions", speech_stats["evictions"])
@@ -8,12 +8,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from lifelens.auth.session import init_session, is_logged_in, get_current_user, get_active_patient_id
 from lifelens.qdrant.client import get_qdrant_client
 from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.qdrant.filters import patient_memories_filter
 from lifelens.utils.analytics import get_memory_stats
 from lifelens.utils.memory_requests import create_request, get_requests_for_patient
 import pandas as pd
 import altair as alt
 from datetime import datetime
-import base64
+from lifelens.utils.blob_store import load_media_bytes
 
 # Page Config
 st.set_page_config(page_title="Family Portal", page_icon="👨‍👩‍👧‍👦", layout="wide")
@@ -123,7 +124,7 @@ with tab1:
             limit=5,
             with_payload=True,
             with_vectors=False,
-            scroll_filter={"must": [{"key": "patient_id", "match": {"value": patient_id}}]}
+            scroll_filter=patient_memories_filter(patient_id)
         )[0]
         
         if recent_results:
@@ -187,8 +188,9 @@ with tab2:
                 col1, col2 = st.columns([1, 4])
                 
                 with col1:
-                    if mem.get("source_image_base64"):
-                        st.image(base64.b64decode(mem["source_image_base64"]), use_column_width=True)
+                    image_bytes = load_media_bytes(mem, rendition="thumb") if mem.get("type") == "image" else None
+                    if image_bytes:
+                        st.image(image_bytes, use_column_width=True)
                     else:
                         st.markdown("🎉")
                 
@@ -294,7 +296,7 @@ with tab4:
     
     if stats and stats["memories"]:
         # Filter only images
-        images = [m for m in stats["memories"] if m.get("type") == "image" and m.get("source_image_base64")]
+        images = [m for m in stats["memories"] if m.get("type") == "image" and (m.get("media") or m.get("source_image_base64"))]
         
         if images:
             st.write(f"**{len(images)} photos**")
@@ -304,7 +306,9 @@ with tab4:
             
             for idx, img in enumerate(images):
                 with cols[idx % 3]:
-                    st.image(base64.b64decode(img["source_image_base64"]), use_column_width=True)
+                    image_bytes = load_media_bytes(img, rendition="thumb")
+                    if image_bytes:
+                        st.image(image_bytes, use_column_width=True)
                     
                     timestamp = datetime.fromtimestamp(img.get("timestamp", 0)).strftime("%b %d, %Y")
                     st.caption(timestamp)
@@ -10,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from lifelens.auth.session import init_session, is_logged_in, get_active_patient_id, get_current_user
 from lifelens.qdrant.client import get_qdrant_client
 from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.qdrant.filters import patient_memories_filter
 from datetime import datetime
 
 # Page Config
@@ -87,7 +88,7 @@ results = client.scroll(
     limit=1000,
     with_payload=True,
     with_vectors=False,
-    scroll_filter={"must": [{"key": "patient_id", "match": {"value": patient_id}}]}
+    scroll_filter=patient_memories_filter(patient_id)
 )[0]
 
 memories_with_location = []
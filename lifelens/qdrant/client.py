@@ -2,11 +2,10 @@ import streamlit as st
 from qdrant_client import QdrantClient
 from lifelens.config import QDRANT_URL, QDRANT_API_KEY
 
-@st.cache_resource
-def get_qdrant_client() -> QdrantClient:
+def create_qdrant_client() -> QdrantClient:
     """
-    Initializes and returns a QdrantClient instance.
-    Cached by Streamlit to avoid multiple connections.
+    Creates a new QdrantClient instance.
+    Used directly by command-line tools that run outside Streamlit.
     """
     if not QDRANT_URL:
         raise ValueError("QDRANT_URL is not set in environment variables.")
@@ -18,3 +17,11 @@ def get_qdrant_client() -> QdrantClient:
         verify=False  # Disable SSL verification for self-signed certificates
     )
     return client
+
+@st.cache_resource
+def get_qdrant_client() -> QdrantClient:
+    """
+    Initializes and returns a QdrantClient instance.
+    Cached by Streamlit to avoid multiple connections.
+    """
+    return create_qdrant_client()
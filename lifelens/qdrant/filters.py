@@ -0,0 +1,66 @@
+from qdrant_client.http import models
+
+def patient_memories_filter(patient_id: str) -> dict:
+    """
+    Scroll filter for a patient's memories.
+    Excludes the chunk points of long memories, which only exist for search.
+    """
+    return {
+        "must": [{"key": "patient_id", "match": {"value": patient_id}}],
+        "must_not": [{"key": "is_chunk", "match": {"value": True}}]
+    }
+
+def normalize_person_tags(person_tags) -> list:
+    """
+    Normalized list of people from a comma-separated tag string (or list),
+    as stored in the indexed `people` payload field.
+    """
+    if not person_tags:
+        return []
+    if isinstance(person_tags, str):
+        person_tags = person_tags.split(",")
+    people = []
+    for tag in person_tags:
+        person = " ".join(tag.lower().split())
+        if person and person not in people:
+            people.append(person)
+    return people
+
+# Search filter keys -> (payload field, normalizer for the requested values)
+MATCH_ANY_FILTERS = {
+    "types": ("type", None),
+    "sentiments": ("sentiment", None),
+    "categories": ("category", None),
+    "people": ("people", normalize_person_tags)
+}
+
+def memory_search_filter(patient_id: str = None, filters: dict = None):
+    """
+    Builds the Qdrant filter for a memory search.
+
+    Args:
+        patient_id: Filter by patient ID
+        filters: Optional dict with any of
+            'timestamp': range arguments, e.g. {'gte': 12345, 'lt': 67890}
+            'types', 'sentiments', 'categories', 'people': lists of accepted values
+
+    Returns:
+        models.Filter, or None if there is nothing to filter on
+    """
+    filters = filters or {}
+    conditions = []
+
+    if patient_id:
+        conditions.append(models.FieldCondition(key="patient_id", match=models.MatchValue(value=patient_id)))
+
+    if filters.get("timestamp"):
+        conditions.append(models.FieldCondition(key="timestamp", range=models.Range(**filters["timestamp"])))
+
+    for filter_key, (field, normalize) in MATCH_ANY_FILTERS.items():
+        values = filters.get(filter_key)
+        if normalize:
+            values = normalize(values)
+        if values:
+            conditions.append(models.FieldCondition(key=field, match=models.MatchAny(any=list(values))))
+
+    return models.Filter(must=conditions) if conditions else None
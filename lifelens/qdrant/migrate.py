@@ -0,0 +1,411 @@
+"""
+One-off maintenance migrations for existing LifeLens collections.
+
+Usage:
+    python -m lifelens.qdrant.migrate blobs [--batch-size 64] [--dry-run]
+    python -m lifelens.qdrant.migrate reindex [--batch-size 64]
+    python -m lifelens.qdrant.migrate renditions [--batch-size 64]
+    python -m lifelens.qdrant.migrate chunks [--batch-size 64]
+    python -m lifelens.qdrant.migrate sparse TARGET_COLLECTION [--batch-size 64]
+    python -m lifelens.qdrant.migrate people [--batch-size 64]
+"""
+import argparse
+import base64
+import io
+import logging
+from PIL import Image
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from lifelens.config import QDRANT_COLLECTION_NAME, SPARSE_VECTOR_NAME
+from lifelens.qdrant.client import create_qdrant_client
+from lifelens.qdrant.schema import create_collection_if_not_exists, link_unparented_points
+from lifelens.qdrant.filters import normalize_person_tags
+from lifelens.ingestion.upsert_memory import get_embeddings, build_chunk_points, point_vector
+from lifelens.utils.sparse_vectors import sparse_document_vector
+from lifelens.ingestion.renditions import make_renditions
+from lifelens.utils.blob_store import store_media, load_media_bytes
+from lifelens.utils.logging import setup_logging
+
+INLINE_MEDIA_FIELDS = {
+    "source_image_base64": "image/jpeg",
+    "source_audio_base64": "audio/wav"
+}
+
+def inline_media_mime(field: str, data: bytes) -> str:
+    """
+    Returns the MIME type of inline media, detecting the actual image format
+    since uploads were not always JPEG.
+    """
+    default_mime = INLINE_MEDIA_FIELDS[field]
+    if not default_mime.startswith("image/"):
+        return default_mime
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return Image.MIME.get(image.format, default_mime)
+    except Exception as e:
+        logging.warning(f"Could not detect image format, assuming {default_mime}: {e}")
+        return default_mime
+
+def migrate_inline_blobs(client: QdrantClient, batch_size: int = 64, dry_run: bool = False):
+    """
+    Moves inline base64 media out of point payloads into the blob store.
+    Each migrated point keeps a `media` reference and loses the base64 field.
+
+    Returns:
+        Number of points migrated, or that would be migrated when `dry_run` is set
+    """
+    migrated = 0
+    offset = None
+
+    has_inline_media = models.Filter(should=[
+        models.Filter(must_not=[models.IsEmptyCondition(is_empty=models.PayloadField(key=field))])
+        for field in INLINE_MEDIA_FIELDS
+    ])
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=has_inline_media,
+            limit=batch_size,
+            offset=offset,
+            with_payload=list(INLINE_MEDIA_FIELDS),
+            with_vectors=False
+        )
+
+        for point in points:
+            stored = False
+            for field in INLINE_MEDIA_FIELDS:
+                inline = point.payload.get(field)
+                if not inline:
+                    continue
+
+                if dry_run:
+                    logging.info(f"Would migrate {field} of point {point.id}")
+                    stored = True
+                    continue
+
+                data = base64.b64decode(inline)
+                media = store_media(data, inline_media_mime(field, data))
+                client.set_payload(
+                    collection_name=QDRANT_COLLECTION_NAME,
+                    payload={"media": media},
+                    points=[point.id]
+                )
+                client.delete_payload(
+                    collection_name=QDRANT_COLLECTION_NAME,
+                    keys=[field],
+                    points=[point.id]
+                )
+                logging.info(f"Migrated {field} of point {point.id} to blob {media['sha256']}")
+                stored = True
+            if stored:
+                migrated += 1
+
+        if offset is None:
+            break
+
+    return migrated
+
+TEXT_FIELDS = {
+    "image": "caption",
+    "audio": "transcript",
+    "text": "content"
+}
+
+def reindex_vectors(client: QdrantClient, batch_size: int = 64):
+    """
+    Recomputes the vectors of every point from its stored text.
+    Embeddings go through the embedding cache, so only text that changed
+    since it was last embedded costs an API call.
+
+    Returns:
+        Number of points re-indexed
+    """
+    reindexed = 0
+    offset = None
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["type", "chunk_text"] + list(TEXT_FIELDS.values()),
+            with_vectors=False
+        )
+
+        batch = []
+        for point in points:
+            text = point.payload.get("chunk_text") or point.payload.get(TEXT_FIELDS.get(point.payload.get("type"), ""))
+            if text:
+                batch.append((point.id, text))
+
+        if batch:
+            vectors = get_embeddings([text for _, text in batch])
+            client.update_vectors(
+                collection_name=QDRANT_COLLECTION_NAME,
+                points=[
+                    models.PointVectors(id=point_id, vector=point_vector(client, vector, text))
+                    for (point_id, text), vector in zip(batch, vectors)
+                ]
+            )
+            reindexed += len(batch)
+
+        if offset is None:
+            break
+
+    return reindexed
+
+def backfill_renditions(client: QdrantClient, batch_size: int = 64):
+    """
+    Generates thumbnail/display renditions for image memories stored
+    before renditions were produced at ingest. Run after `blobs`.
+
+    Returns:
+        Number of points updated
+    """
+    updated = 0
+    offset = None
+    is_image = models.Filter(must=[
+        models.FieldCondition(key="type", match=models.MatchValue(value="image"))
+    ])
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=is_image,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["media"],
+            with_vectors=False
+        )
+
+        for point in points:
+            media = point.payload.get("media")
+            if not media or media.get("renditions"):
+                continue
+
+            image_bytes = load_media_bytes(point.payload)
+            if not image_bytes:
+                continue
+
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                renditions = make_renditions(image)
+            media["renditions"] = {
+                name: store_media(rendition_bytes, "image/webp")
+                for name, rendition_bytes in renditions.items()
+            }
+            client.set_payload(
+                collection_name=QDRANT_COLLECTION_NAME,
+                payload={"media": media},
+                points=[point.id]
+            )
+            updated += 1
+
+        if offset is None:
+            break
+
+    return updated
+
+def backfill_chunks(client: QdrantClient, batch_size: int = 64):
+    """
+    Links memories stored before chunked indexing to themselves via
+    `parent_id` (also done automatically on startup) and indexes chunk
+    points for their long texts. Memories whose first chunk already exists
+    are skipped, so the command can be re-run safely.
+
+    Returns:
+        Number of memories chunked
+    """
+    link_unparented_points(client)
+
+    updated = 0
+    offset = None
+    memories_only = models.Filter(must_not=[
+        models.FieldCondition(key="is_chunk", match=models.MatchValue(value=True))
+    ])
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=memories_only,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+
+        chunks_by_memory = {}
+        for point in points:
+            point_id = str(point.id)
+            payload = {**point.payload, "parent_id": point_id}
+            text = payload.get(TEXT_FIELDS.get(payload.get("type"), ""))
+            if text:
+                chunks = build_chunk_points(point_id, payload, text)
+                if chunks:
+                    chunks_by_memory[point_id] = chunks
+
+        if chunks_by_memory:
+            existing = client.retrieve(
+                collection_name=QDRANT_COLLECTION_NAME,
+                ids=[chunks[0]["id"] for chunks in chunks_by_memory.values()],
+                with_payload=False,
+                with_vectors=False
+            )
+            already_chunked = {str(point.id) for point in existing}
+            chunk_points = []
+            for chunks in chunks_by_memory.values():
+                if chunks[0]["id"] not in already_chunked:
+                    chunk_points.extend(chunks)
+                    updated += 1
+
+            if chunk_points:
+                vectors = get_embeddings([chunk["text"] for chunk in chunk_points])
+                client.upsert(
+                    collection_name=QDRANT_COLLECTION_NAME,
+                    points=[
+                        models.PointStruct(
+                            id=chunk["id"],
+                            vector=point_vector(client, vector, chunk["text"]),
+                            payload=chunk["payload"]
+                        )
+                        for chunk, vector in zip(chunk_points, vectors)
+                    ]
+                )
+
+        if offset is None:
+            break
+
+    return updated
+
+def copy_with_sparse_vectors(client: QdrantClient, target_collection: str, batch_size: int = 64):
+    """
+    Copies every point into a new collection that also has the keyword sparse
+    vector, computing sparse vectors from the stored text. Dense vectors are
+    copied as they are, so no embedding calls are made. Qdrant cannot add a
+    vector to an existing collection, hence the copy.
+
+    Returns:
+        Number of points copied
+    """
+    create_collection_if_not_exists(client, target_collection)
+    copied = 0
+    offset = None
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+
+        batch = []
+        for point in points:
+            dense = point.vector.get("") if isinstance(point.vector, dict) else point.vector
+            text = point.payload.get("chunk_text") or point.payload.get(TEXT_FIELDS.get(point.payload.get("type"), ""), "")
+            batch.append(models.PointStruct(
+                id=point.id,
+                vector={"": dense, SPARSE_VECTOR_NAME: sparse_document_vector(text)},
+                payload=point.payload
+            ))
+
+        if batch:
+            client.upsert(collection_name=target_collection, points=batch)
+            copied += len(batch)
+
+        if offset is None:
+            break
+
+    return copied
+
+def backfill_people(client: QdrantClient, batch_size: int = 64):
+    """
+    Adds the normalized `people` list used by the people search filter to
+    points that have person tags but were stored before it existed.
+
+    Returns:
+        Number of points updated
+    """
+    updated = 0
+    offset = None
+    needs_people = models.Filter(
+        must_not=[models.IsEmptyCondition(is_empty=models.PayloadField(key="person_tags"))],
+        must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="people"))]
+    )
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=QDRANT_COLLECTION_NAME,
+            scroll_filter=needs_people,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["person_tags"],
+            with_vectors=False
+        )
+
+        for point in points:
+            client.set_payload(
+                collection_name=QDRANT_COLLECTION_NAME,
+                payload={"people": normalize_person_tags(point.payload.get("person_tags"))},
+                points=[point.id]
+            )
+            updated += 1
+
+        if offset is None:
+            break
+
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="LifeLens collection migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    blobs = subparsers.add_parser("blobs", help="Move inline base64 media into the blob store")
+    blobs.add_argument("--batch-size", type=int, default=64)
+    blobs.add_argument("--dry-run", action="store_true")
+
+    reindex = subparsers.add_parser("reindex", help="Recompute vectors from stored text")
+    reindex.add_argument("--batch-size", type=int, default=64)
+
+    renditions = subparsers.add_parser("renditions", help="Generate missing image renditions")
+    renditions.add_argument("--batch-size", type=int, default=64)
+
+    chunks = subparsers.add_parser("chunks", help="Index chunks of long texts of existing memories")
+    chunks.add_argument("--batch-size", type=int, default=64)
+
+    sparse = subparsers.add_parser("sparse", help="Copy the collection into a new one with keyword sparse vectors")
+    sparse.add_argument("target_collection")
+    sparse.add_argument("--batch-size", type=int, default=64)
+
+    people = subparsers.add_parser("people", help="Add the normalized people field used by search filters")
+    people.add_argument("--batch-size", type=int, default=64)
+
+    args = parser.parse_args()
+    setup_logging()
+    client = create_qdrant_client()
+
+    if args.command == "blobs":
+        count = migrate_inline_blobs(client, batch_size=args.batch_size, dry_run=args.dry_run)
+        if args.dry_run:
+            logging.info(f"Dry run. {count} points would migrate.")
+        else:
+            logging.info(f"Done. {count} points migrated.")
+    elif args.command == "reindex":
+        count = reindex_vectors(client, batch_size=args.batch_size)
+        logging.info(f"Done. {count} points re-indexed.")
+    elif args.command == "renditions":
+        count = backfill_renditions(client, batch_size=args.batch_size)
+        logging.info(f"Done. {count} images given renditions.")
+    elif args.command == "chunks":
+        count = backfill_chunks(client, batch_size=args.batch_size)
+        logging.info(f"Done. {count} memories chunked.")
+    elif args.command == "sparse":
+        count = copy_with_sparse_vectors(client, args.target_collection, batch_size=args.batch_size)
+        logging.info(f"Done. {count} points copied. Set LIFELENS_COLLECTION={args.target_collection} to use it.")
+    elif args.command == "people":
+        count = backfill_people(client, batch_size=args.batch_size)
+        logging.info(f"Done. {count} points given a people field.")
+
+if __name__ == "__main__":
+    main()
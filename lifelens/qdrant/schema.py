@@ -1,42 +1,141 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from lifelens.config import QDRANT_COLLECTION_NAME, VECTOR_SIZE, DISTANCE_METRIC
+from lifelens.config import QDRANT_COLLECTION_NAME, VECTOR_SIZE, DISTANCE_METRIC, SPARSE_VECTOR_NAME
 import logging
+import threading
 
-def create_collection_if_not_exists(client: QdrantClient):
+# Payload indexes used for search filters, duplicate lookups and chunk grouping
+PAYLOAD_INDEXES = {
+    "patient_id": models.PayloadSchemaType.KEYWORD,
+    "content_hash": models.PayloadSchemaType.KEYWORD,
+    "phash": models.PayloadSchemaType.KEYWORD,
+    "parent_id": models.PayloadSchemaType.KEYWORD,
+    "is_chunk": models.PayloadSchemaType.BOOL,
+    "type": models.PayloadSchemaType.KEYWORD,
+    "sentiment": models.PayloadSchemaType.KEYWORD,
+    "category": models.PayloadSchemaType.KEYWORD,
+    "people": models.PayloadSchemaType.KEYWORD,
+    # Range filters only; timestamps are never matched exactly
+    "timestamp": models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=False, range=True)
+}
+
+_linked_collections = set()
+_linked_lock = threading.Lock()
+
+def link_unparented_points(client: QdrantClient, collection_name: str = QDRANT_COLLECTION_NAME,
+                           batch_size: int = 256) -> int:
+    """
+    Sets `parent_id` to the point's own ID on memories stored before chunked
+    indexing; grouped search skips points without it. Runs once per process
+    and collection, and costs a single empty scroll once everything is linked.
+
+    Returns:
+        Number of points linked
+    """
+    with _linked_lock:
+        if collection_name in _linked_collections:
+            return 0
+
+        missing_parent = models.Filter(must=[
+            models.IsEmptyCondition(is_empty=models.PayloadField(key="parent_id"))
+        ])
+        linked = 0
+        while True:
+            # Linked points drop out of the filter, so always read the first page
+            points, _ = client.scroll(
+                collection_name=collection_name,
+                scroll_filter=missing_parent,
+                limit=batch_size,
+                with_payload=False,
+                with_vectors=False
+            )
+            if not points:
+                break
+            client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=[
+                    models.SetPayloadOperation(set_payload=models.SetPayload(
+                        payload={"parent_id": str(point.id)},
+                        points=[point.id]
+                    ))
+                    for point in points
+                ]
+            )
+            linked += len(points)
+
+        if linked:
+            logging.info(f"Linked {linked} memories in '{collection_name}' to themselves via parent_id")
+        _linked_collections.add(collection_name)
+        return linked
+
+def create_collection_if_not_exists(client: QdrantClient, collection_name: str = QDRANT_COLLECTION_NAME):
     """
     Creates the Qdrant collection for LifeLens if it does not already exist.
-    Also ensures patient_id index exists for filtering.
+    Also ensures the payload indexes used for filtering exist, and links
+    memories stored before chunked indexing (see link_unparented_points).
+    New collections get the unnamed dense vector plus the keyword sparse vector.
     """
     try:
         collections = client.get_collections()
         existing_collections = [c.name for c in collections.collections]
 
-        if QDRANT_COLLECTION_NAME not in existing_collections:
-            logging.info(f"Creating collection '{QDRANT_COLLECTION_NAME}'...")
+        if collection_name not in existing_collections:
+            logging.info(f"Creating collection '{collection_name}'...")
             client.create_collection(
-                collection_name=QDRANT_COLLECTION_NAME,
+                collection_name=collection_name,
                 vectors_config=models.VectorParams(
                     size=VECTOR_SIZE,
                     distance=models.Distance.COSINE
-                )
+                ),
+                sparse_vectors_config={
+                    SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+                }
             )
-            logging.info(f"Collection '{QDRANT_COLLECTION_NAME}' created successfully.")
+            logging.info(f"Collection '{collection_name}' created successfully.")
         else:
-            logging.info(f"Collection '{QDRANT_COLLECTION_NAME}' already exists.")
+            logging.info(f"Collection '{collection_name}' already exists.")
+            vectors_config = client.get_collection(collection_name).config.params.vectors
+            if isinstance(vectors_config, models.VectorParams) and vectors_config.size != VECTOR_SIZE:
+                raise ValueError(
+                    f"Collection '{collection_name}' stores {vectors_config.size}-d vectors but the "
+                    f"configured embedding model produces {VECTOR_SIZE}-d vectors. "
+                    f"Set LIFELENS_COLLECTION to a new collection and re-ingest, or switch the provider back."
+                )
         
-        # Create or update patient_id index for filtering
-        try:
-            client.create_payload_index(
-                collection_name=QDRANT_COLLECTION_NAME,
-                field_name="patient_id",
-                field_schema=models.PayloadSchemaType.KEYWORD
-            )
-            logging.info("Created patient_id index for filtering.")
-        except Exception as idx_error:
-            # Index might already exist
-            logging.info(f"patient_id index status: {idx_error}")
+        # Create or update payload indexes
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            try:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+                logging.info(f"Created {field_name} index for filtering.")
+            except Exception as idx_error:
+                # Index might already exist
+                logging.info(f"{field_name} index status: {idx_error}")
+        
+        link_unparented_points(client, collection_name)
             
     except Exception as e:
         logging.error(f"Failed to check or create collection: {e}")
         raise e
+
+_sparse_support = {}
+_sparse_support_lock = threading.Lock()
+
+def has_sparse_vectors(client: QdrantClient, collection_name: str = QDRANT_COLLECTION_NAME) -> bool:
+    """
+    Whether the collection has the keyword sparse vector. Collections created
+    before hybrid search only hold dense vectors (see `migrate sparse`).
+    """
+    with _sparse_support_lock:
+        if collection_name not in _sparse_support:
+            sparse_config = client.get_collection(collection_name).config.params.sparse_vectors or {}
+            _sparse_support[collection_name] = SPARSE_VECTOR_NAME in sparse_config
+            if not _sparse_support[collection_name]:
+                logging.warning(
+                    f"Collection '{collection_name}' has no '{SPARSE_VECTOR_NAME}' sparse vector; "
+                    f"hybrid and keyword search fall back to dense search."
+                )
+        return _sparse_support[collection_name]
@@ -0,0 +1,109 @@
+import threading
+import time
+import numpy as np
+from lifelens.config import ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_PER_PATIENT
+from lifelens.utils.embedding_cache import normalize_text
+
+
+class AnswerCache:
+    """
+    Per-patient cache of generated answers and their speech.
+
+    An entry is reused when the same memories were retrieved and the new
+    question's embedding is close enough to the cached one (or, without an
+    embedding, the normalized question text is identical). Entries of a
+    patient are dropped whenever that patient's memories change.
+    """
+
+    def __init__(self, similarity: float = ANSWER_CACHE_SIMILARITY, ttl: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_per_patient: int = ANSWER_CACHE_MAX_PER_PATIENT):
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_per_patient = max_per_patient
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _unit(vector):
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, patient_id: str, query: str, point_ids, vector=None):
+        """
+        Returns the cached {"answer", "audio"} for this question, or None.
+        """
+        point_ids = frozenset(point_ids)
+        text = normalize_text(query)
+        unit = self._unit(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._entries.get(patient_id, [])
+            entries[:] = [entry for entry in entries if now - entry["created_at"] < self.ttl]
+            for entry in entries:
+                if entry["point_ids"] != point_ids:
+                    continue
+                if entry["text"] == text or (
+                    unit is not None and entry["unit"] is not None
+                    and float(np.dot(unit, entry["unit"])) >= self.similarity
+                ):
+                    # Most recently used last
+                    entries.remove(entry)
+                    entries.append(entry)
+                    self._stats["hits"] += 1
+                    return {"answer": entry["answer"], "audio": entry["audio"]}
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, patient_id: str, query: str, point_ids, answer: str, audio: bytes = None, vector=None):
+        """
+        Stores a generated answer and its audio.
+        """
+        entry = {
+            "text": normalize_text(query),
+            "unit": self._unit(vector),
+            "point_ids": frozenset(point_ids),
+            "answer": answer,
+            "audio": audio,
+            "created_at": time.monotonic()
+        }
+        with self._lock:
+            entries = self._entries.setdefault(patient_id, [])
+            entries.append(entry)
+            del entries[:-self.max_per_patient]
+
+    def invalidate(self, patient_id: str = None):
+        """
+        Drops the cached answers of a patient (or of every patient).
+        """
+        with self._lock:
+            if patient_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(patient_id, None)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/invalidation counters and the current number of entries.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = sum(len(entries) for entries in self._entries.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_answer_cache = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    Returns the process-wide answer cache.
+    """
+    return _answer_cache
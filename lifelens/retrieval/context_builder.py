@@ -0,0 +1,116 @@
+import re
+from lifelens.config import (
+    CONTEXT_TOKEN_BUDGET, CONTEXT_MAX_MEMORY_TOKENS, CONTEXT_MIN_SCORE, CONTEXT_MIN_RELATIVE_SCORE,
+    CONTEXT_MAX_SCORE_GAP, CONTEXT_DUPLICATE_SIMILARITY
+)
+from lifelens.utils.sparse_vectors import tokenize
+
+TEXT_FIELDS = {
+    "image": "caption",
+    "audio": "transcript",
+    "text": "content"
+}
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about 4 characters per token for English).
+    """
+    return len(text) // 4 + 1
+
+def _memory_text(memory: dict) -> str:
+    return memory.get("matched_chunk") or memory.get(TEXT_FIELDS.get(memory.get("type"), "")) or ""
+
+def best_sentences(text: str, query: str, max_tokens: int) -> str:
+    """
+    Shortens a long text to the sentences sharing the most words with the
+    query, kept in their original order, within `max_tokens`.
+    """
+    sentences = [s for s in _SENTENCE_BOUNDARY.split(text) if s.strip()]
+    query_terms = set(tokenize(query))
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (-len(query_terms & set(tokenize(sentences[i]))), i)
+    )
+
+    chosen, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i])
+        if used + cost > max_tokens:
+            if not chosen:
+                # A single overlong sentence: cut it at the budget
+                return sentences[i][:max_tokens * 4]
+            continue
+        chosen.add(i)
+        used += cost
+    return " … ".join(sentences[i] for i in sorted(chosen))
+
+def build_context(query: str, memories: list, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                  cosine_scores: bool = True, min_score: float = CONTEXT_MIN_SCORE) -> list:
+    """
+    Chooses which retrieved memories go into the answer prompt, and how much
+    of each, so prompt size stays bounded however many memories match.
+
+    - With cosine scores, hits below `min_score`, below a fraction of the
+      best score, or after a large drop in score are dropped (the number of
+      hits used adapts to how clearly the top results stand out). Fused (RRF)
+      and keyword scores only reflect rank, so there the budget alone decides.
+    - Near-duplicate memories are kept once.
+    - Long texts are cut down to the sentences that best match the query.
+    - Memories are added best first until the token budget is spent.
+
+    Args:
+        query: User query string
+        memories: Search results, best first
+        token_budget: Approximate token budget for all memory texts together
+        cosine_scores: Whether scores are cosine similarities (dense search);
+            the score cutoffs are skipped otherwise
+        min_score: Absolute score cutoff for cosine scores
+
+    Returns:
+        The selected memories, each with a `context_text` (and `context_excerpt`
+        set when that text is only part of the memory)
+    """
+    if not memories:
+        return []
+
+    top_score = memories[0].get("score") or 0
+    selected, seen_words, used = [], [], 0
+    previous_score = top_score
+
+    for memory in memories:
+        score = memory.get("score") or 0
+        if cosine_scores:
+            if min_score is not None and score < min_score:
+                break
+            if top_score > 0 and (score < top_score * CONTEXT_MIN_RELATIVE_SCORE
+                                  or previous_score - score > top_score * CONTEXT_MAX_SCORE_GAP):
+                break
+            previous_score = score
+
+        text = _memory_text(memory)
+        if not text:
+            continue
+
+        words = set(tokenize(text))
+        if any(
+            words and len(words & other) / len(words | other) >= CONTEXT_DUPLICATE_SIMILARITY
+            for other in seen_words
+        ):
+            continue
+
+        excerpt = bool(memory.get("matched_chunk"))
+        if estimate_tokens(text) > CONTEXT_MAX_MEMORY_TOKENS:
+            text = best_sentences(text, query, CONTEXT_MAX_MEMORY_TOKENS)
+            excerpt = True
+
+        cost = estimate_tokens(text)
+        if selected and used + cost > token_budget:
+            break
+
+        selected.append({**memory, "context_text": text, "context_excerpt": excerpt})
+        seen_words.append(words)
+        used += cost
+
+    return selected
@@ -1,22 +1,24 @@
 import os
-from groq import Groq
+from lifelens.utils.ai_clients import get_groq_client, call_with_retries, stream_with_retries
 from lifelens.config import GROQ_API_KEY
 
-def get_answer(query: str, memories: list) -> str:
+def _build_messages(query: str, memories: list) -> list:
     """
-    Generates an answer using Groq LLaMA 3 based on retrieved memories.
+    Builds the chat messages for answering a query from retrieved memories.
     """
-    if not GROQ_API_KEY:
-        return "Error: GROQ_API_KEY is not set."
-
-    client = Groq(api_key=GROQ_API_KEY)
-
     # Format Memories for Context
     memory_context = ""
     for idx, mem in enumerate(memories):
         mem_type = mem.get('type')
         content = ""
-        if mem_type == 'image':
+        label = {'image': 'Image Caption', 'audio': 'Audio Transcript', 'text': 'Note'}.get(mem_type, 'Memory')
+        if mem.get('context_text'):
+            # Prepared by the context builder, possibly cut to the relevant sentences
+            content = f"{label}{' (excerpt)' if mem.get('context_excerpt') else ''}: {mem['context_text']}"
+        elif mem.get('matched_chunk'):
+            # Long memory: only the excerpt that matched the query
+            content = f"{label} (excerpt): {mem.get('matched_chunk')}"
+        elif mem_type == 'image':
             content = f"Image Caption: {mem.get('caption')}"
         elif mem_type == 'audio':
             content = f"Audio Transcript: {mem.get('transcript')}"
@@ -47,13 +49,24 @@ Retrieved Memories:
 Generate a helpful, safe, grounded answer.
 """
 
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": system_prompt}
+    ]
+
+def get_answer(query: str, memories: list) -> str:
+    """
+    Generates an answer using Groq LLaMA 3 based on retrieved memories.
+    """
+    if not GROQ_API_KEY:
+        return "Error: GROQ_API_KEY is not set."
+
     try:
-        completion = client.chat.completions.create(
+        completion = call_with_retries(
+            "groq",
+            get_groq_client().chat.completions.create,
             model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": system_prompt}
-            ],
+            messages=_build_messages(query, memories),
             temperature=0.7,
             max_tokens=1024,
             top_p=1,
@@ -65,3 +78,42 @@ Generate a helpful, safe, grounded answer.
         
     except Exception as e:
         return f"Error generating answer: {str(e)}"
+
+class AnswerStreamError(RuntimeError):
+    """
+    Raised by stream_answer when no complete answer could be generated.
+    Text yielded before the error is only part of an answer.
+    """
+
+def stream_answer(query: str, memories: list):
+    """
+    Streaming variant of get_answer: yields the answer text piece by piece
+    as Groq generates it.
+
+    Raises:
+        AnswerStreamError: if the answer could not be generated, possibly
+            after part of it has been yielded
+    """
+    if not GROQ_API_KEY:
+        raise AnswerStreamError("Error: GROQ_API_KEY is not set.")
+
+    try:
+        stream = stream_with_retries(
+            "groq",
+            get_groq_client().chat.completions.create,
+            model="llama-3.3-70b-versatile",
+            messages=_build_messages(query, memories),
+            temperature=0.7,
+            max_tokens=1024,
+            top_p=1,
+            stream=True,
+            stop=None,
+        )
+        
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+        
+    except Exception as e:
+        raise AnswerStreamError(f"Error generating answer: {str(e)}") from e
@@ -1,94 +1,152 @@
-import google.generativeai as genai
 from qdrant_client import QdrantClient
-from lifelens.config import QDRANT_COLLECTION_NAME, GEMINI_API_KEY
+from lifelens.config import QDRANT_COLLECTION_NAME, SPARSE_VECTOR_NAME, SEARCH_MODE, HYBRID_PREFETCH_LIMIT
+from lifelens.qdrant.schema import has_sparse_vectors
+from lifelens.qdrant.filters import memory_search_filter
+from lifelens.utils.embedding_cache import get_query_cache, embedding_key
+from lifelens.utils.embeddings import get_embedding_provider
+from lifelens.utils.sparse_vectors import sparse_query_vector
 from qdrant_client.http import models
 import logging
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+# Payload fields returned by search: text, metadata and the small blob-store
+# media reference. Inline base64 media of memories stored before the blob store
+# is left out and fetched separately (fetch_memory_media) when displayed.
+SEARCH_PAYLOAD_FIELDS = [
+    "type", "caption", "transcript", "content", "timestamp", "sentiment",
+    "person_tags", "category", "is_milestone", "segments", "media"
+]
+MEDIA_PAYLOAD_FIELDS = ["media", "source_image_base64", "source_audio_base64"]
 
-def get_embedding(text: str):
-    """
-    Generates embedding using Gemini API (Query mode).
-    """
+def _embed_query(text: str):
     try:
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=text,
-            task_type="retrieval_query"
-        )
-        return result['embedding']
+        return get_embedding_provider().embed_query(text)
     except Exception as e:
         logging.error(f"Failed to generate embedding: {e}")
         raise e
 
-def search_memories(client: QdrantClient, query: str, filters: dict = None, top_k: int = 10, patient_id: str = None):
+def get_embedding(text: str):
+    """
+    Generates a query embedding with the configured provider.
+    Repeated queries are served from the query cache, and identical
+    concurrent queries share one outstanding call.
+    """
+    key = embedding_key(get_embedding_provider().model_name, "retrieval_query", text)
+    return get_query_cache().get_or_compute(key, lambda: _embed_query(text))
+
+def get_query_cache_stats() -> dict:
+    """
+    Returns hit/miss statistics of the query embedding cache.
+    """
+    return get_query_cache().stats()
+
+def search_memories(client: QdrantClient, query: str, filters: dict = None, top_k: int = 10, patient_id: str = None,
+                    mode: str = SEARCH_MODE):
     """
-    Search for memories in Qdrant based on semantic similarity using Gemini Embeddings.
+    Search for memories in Qdrant based on semantic similarity, keywords, or both.
+    Long memories are also indexed as chunks; hits are grouped by parent
+    memory so each memory appears once, with its best matching chunk.
     
     Args:
         client: QdrantClient instance
         query: User query string
-        filters: Optional dictionary for filtering (e.g., {'timestamp': {'gte': 12345}}})
+        filters: Optional dictionary for filtering, e.g.
+            {'timestamp': {'gte': 12345}, 'types': ['image'], 'sentiments': ['Happy'],
+             'categories': ['Achievement'], 'people': ['Aunt Priya']}
         top_k: Number of results to return
         patient_id: Filter by patient ID
+        mode: "hybrid" (dense + keyword, fused with reciprocal rank fusion),
+            "dense" (embedding only) or "keyword" (no embedding call)
     
     Returns:
-        List of formatted search results
+        List of formatted search results. `media` is the blob-store reference;
+        the media bytes themselves are only loaded when a result is displayed.
+        `matched_chunk` holds the best matching excerpt when a chunk
+        (rather than the whole memory) matched.
     """
     
-    # Generate Query Embedding
-    query_vector = get_embedding(query)
+    if mode != "dense" and not has_sparse_vectors(client):
+        mode = "dense"
+    sparse_vector = sparse_query_vector(query) if mode != "dense" else None
+    if mode == "hybrid" and not sparse_vector.indices:
+        # Nothing but stopwords: no keyword candidates to fuse
+        mode = "dense"
     
-    # Construct Filter
-    qdrant_filter = None
-    conditions = []
-    
-    # Add patient_id filter
-    if patient_id:
-        conditions.append(
-            models.FieldCondition(
-                key="patient_id",
-                match=models.MatchValue(value=patient_id)
-            )
-        )
-    
-    # Add timestamp filters
-    if filters and 'timestamp' in filters:
-        conditions.append(
-            models.FieldCondition(
-                key="timestamp",
-                range=models.Range(**filters['timestamp'])
-            )
-        )
-    
-    if conditions:
-        qdrant_filter = models.Filter(must=conditions)
+    # Construct Filter (applied server-side, on indexed payload fields)
+    qdrant_filter = memory_search_filter(patient_id, filters)
 
-    # Perform Search using query_points
-    search_result = client.query_points(
+    # Build the query for the search mode
+    if mode == "keyword":
+        if not sparse_vector.indices:
+            return []
+        query_args = {"query": sparse_vector, "using": SPARSE_VECTOR_NAME}
+    elif mode == "hybrid":
+        # Both candidate lists are fetched and fused server-side in one request
+        query_args = {
+            "prefetch": [
+                models.Prefetch(query=get_embedding(query), filter=qdrant_filter, limit=HYBRID_PREFETCH_LIMIT),
+                models.Prefetch(query=sparse_vector, using=SPARSE_VECTOR_NAME,
+                                filter=qdrant_filter, limit=HYBRID_PREFETCH_LIMIT)
+            ],
+            "query": models.FusionQuery(fusion=models.Fusion.RRF)
+        }
+    else:
+        query_args = {"query": get_embedding(query)}
+    
+    # One group per parent memory: its best hit (whole memory or chunk),
+    # with the parent's payload looked up alongside
+    groups = client.query_points_groups(
         collection_name=QDRANT_COLLECTION_NAME,
-        query=query_vector,
+        **query_args,
         query_filter=qdrant_filter,
+        group_by="parent_id",
+        group_size=1,
         limit=top_k,
-        with_payload=True
-    ).points
+        with_payload=["is_chunk", "chunk_text", "start_ms"],
+        with_lookup=models.WithLookup(
+            collection=QDRANT_COLLECTION_NAME,
+            with_payload=SEARCH_PAYLOAD_FIELDS,
+            with_vectors=False
+        )
+    ).groups
     
     # Parse Results
     results = []
-    for hit in search_result:
+    for group in groups:
+        if group.lookup is None:
+            # Chunks whose parent memory is gone
+            continue
+        hit = group.hits[0]
+        payload = group.lookup.payload
+        is_chunk = bool(hit.payload.get("is_chunk"))
         results.append({
+            "id": str(group.id),
             "score": hit.score,
-            "type": hit.payload.get("type"),
-            "caption": hit.payload.get("caption"),
-            "transcript": hit.payload.get("transcript"),
-            "content": hit.payload.get("content"),
-            "timestamp": hit.payload.get("timestamp"),
-            "sentiment": hit.payload.get("sentiment"),
-            "person_tags": hit.payload.get("person_tags"),
-            "source_image_base64": hit.payload.get("source_image_base64"),
-            "source_audio_base64": hit.payload.get("source_audio_base64")
+            "type": payload.get("type"),
+            "caption": payload.get("caption"),
+            "transcript": payload.get("transcript"),
+            "content": payload.get("content"),
+            "timestamp": payload.get("timestamp"),
+            "sentiment": payload.get("sentiment"),
+            "person_tags": payload.get("person_tags"),
+            "category": payload.get("category"),
+            "is_milestone": payload.get("is_milestone"),
+            "segments": payload.get("segments"),
+            "media": payload.get("media"),
+            "matched_chunk": hit.payload.get("chunk_text") if is_chunk else None,
+            "matched_start_ms": hit.payload.get("start_ms") if is_chunk else None
         })
         
     return results
+
+def fetch_memory_media(client: QdrantClient, point_id: str) -> dict:
+    """
+    Fetches only the media fields of one memory, for displaying a search result
+    whose media is still stored inline (not yet migrated to the blob store).
+    """
+    points = client.retrieve(
+        collection_name=QDRANT_COLLECTION_NAME,
+        ids=[point_id],
+        with_payload=MEDIA_PAYLOAD_FIELDS,
+        with_vectors=False
+    )
+    return points[0].payload if points else {}
@@ -1,42 +1,415 @@
+import calendar
 import datetime
+import logging
+import re
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from lifelens.config import DEFAULT_TIMEZONE
 
-def parse_time_filter(query: str):
+# Rule-based temporal parser. All patterns are compiled once at import;
+# a query is normalized, checked against a trigger pattern (most questions
+# mention no time at all) and then matched against range rules followed by
+# single-expression rules, most specific first.
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "a couple of": 2, "couple of": 2, "a few": 3, "few": 3, "several": 3
+}
+# Month ranges (start month, months long), northern hemisphere
+SEASONS = {"spring": (3, 3), "summer": (6, 3), "autumn": (9, 3), "fall": (9, 3), "winter": (12, 3)}
+HOLIDAYS = {
+    "christmas eve": (12, 24), "christmas": (12, 25), "new years eve": (12, 31),
+    "new years day": (1, 1), "new years": (1, 1), "new year": (1, 1),
+    "valentines day": (2, 14), "halloween": (10, 31)
+}
+# Hour windows; end hours past 24 run into the next morning
+PARTS_OF_DAY = {
+    "morning": (5, 12), "noon": (11, 14), "midday": (11, 14), "lunchtime": (11, 14),
+    "afternoon": (12, 17), "evening": (17, 21), "night": (21, 29),
+    "tonight": (17, 29), "last night": (17, 29)
+}
+
+MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+WEEKDAY = r"(" + "|".join(WEEKDAYS) + r")"
+NUMBER = r"(\d+|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")"
+UNIT = r"(day|week|month|year)s?"
+YEAR = r"((?:19|20)\d{2})"
+# A bare year only counts after a word that makes it a time ("in 2019"),
+# not as a quantity ("2000 photos") or as part of a date ("2024-02-30")
+YEAR_CONTEXT = r"(?:in|during|from|since|of|before|after|until|till|through|around|by)"
+DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+OF_YEAR = rf"(?:,? (?:in |of )?{YEAR})?"
+
+_TRIGGER = re.compile(
+    r"\d|today|tonight|yesterday|\bago\b|\blast\b|\bpast\b|\bthis\b|recent|lately|these days|"
+    r"week|month|year|birthday|christmas|valentine|halloween|spring|summer|autumn|\bfall\b|winter|"
+    r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)|day\b"
+)
+_PART_OF_DAY = re.compile(r"\b(" + "|".join(sorted(PARTS_OF_DAY, key=len, reverse=True)) + r")\b")
+
+
+class _Context:
     """
-    Heuristic parser to extract time filters from a query.
-    Returns a dictionary suitable for Qdrant range filter or None.
-    
-    Supported phrases:
-    - "yesterday"
-    - "today"
-    - "last week" (last 7 days)
-    """
-    query_lower = query.lower()
-    
-    now = datetime.datetime.now()
-    today_start = datetime.datetime(now.year, now.month, now.day).timestamp()
-    
-    if "today" in query_lower:
-        return {
-            "timestamp": {
-                "gte": int(today_start)
-            }
-        }
-        
-    if "yesterday" in query_lower:
-        yesterday_start = today_start - 86400
-        return {
-            "timestamp": {
-                "gte": int(yesterday_start),
-                "lt": int(today_start)
-            }
-        }
-        
-    if "last week" in query_lower:
-        week_start = today_start - (86400 * 7)
-        return {
-            "timestamp": {
-                "gte": int(week_start)
-            }
-        }
-        
+    The reference point of a parse: current time in the patient's time zone.
+    """
+
+    def __init__(self, now: datetime.datetime, birthday):
+        self.now = now
+        self.tz = now.tzinfo
+        self.today = now.date()
+        self.birthday = birthday
+
+
+def resolve_timezone(timezone=None) -> datetime.tzinfo:
+    """
+    Returns a tzinfo for an IANA name (e.g. "Asia/Kolkata"), the configured
+    default, or the server's local time zone. Unknown names fall back to the
+    next option with a warning.
+    """
+    if isinstance(timezone, datetime.tzinfo):
+        return timezone
+    for name in (timezone, DEFAULT_TIMEZONE):
+        if not name:
+            continue
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logging.warning(f"Unknown time zone '{name}', falling back to the default")
+    return datetime.datetime.now().astimezone().tzinfo
+
+def _parse_birthday(birthday):
+    """
+    (month, day) from a date or a "YYYY-MM-DD" / "MM-DD" string.
+    """
+    if not birthday:
+        return None
+    if isinstance(birthday, datetime.date):
+        return birthday.month, birthday.day
+    parts = [int(part) for part in str(birthday).split("-")]
+    return parts[-2], parts[-1]
+
+def _number(text: str) -> int:
+    return int(text) if text.isdigit() else NUMBER_WORDS[text]
+
+def _month_number(name: str) -> int:
+    return MONTHS[name[:3]]
+
+def _safe_date(year: int, month: int, day: int) -> datetime.date:
+    # Clamps e.g. Feb 29 to Feb 28 in non-leap years
+    return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+def _shift_month(year: int, month: int, delta: int):
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+def _start(ctx: _Context, date: datetime.date) -> datetime.datetime:
+    return datetime.datetime(date.year, date.month, date.day, tzinfo=ctx.tz)
+
+def _dates(ctx: _Context, first: datetime.date, end: datetime.date):
+    return _start(ctx, first), _start(ctx, end)
+
+def _day(ctx: _Context, date: datetime.date):
+    return _dates(ctx, date, date + datetime.timedelta(days=1))
+
+def _week(ctx: _Context, date: datetime.date):
+    monday = date - datetime.timedelta(days=date.weekday())
+    return _dates(ctx, monday, monday + datetime.timedelta(days=7))
+
+def _months(ctx: _Context, year: int, month: int, count: int = 1):
+    end_year, end_month = _shift_month(year, month, count)
+    return _dates(ctx, datetime.date(year, month, 1), datetime.date(end_year, end_month, 1))
+
+def _year(ctx: _Context, year: int):
+    return _dates(ctx, datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1))
+
+def _recent_date(ctx: _Context, month: int, day: int, year=None, strict: bool = False):
+    """
+    A yearly date: in the given year, or its most recent occurrence
+    (before today if `strict`, otherwise today or earlier).
+    """
+    if year:
+        return _day(ctx, _safe_date(int(year), month, day))
+    date = _safe_date(ctx.today.year, month, day)
+    if date > ctx.today or (strict and date == ctx.today):
+        date = _safe_date(ctx.today.year - 1, month, day)
+    return _day(ctx, date)
+
+def _recent_month(ctx: _Context, month: int, strict: bool = False):
+    year = ctx.today.year
+    if month > ctx.today.month or (strict and month == ctx.today.month):
+        year -= 1
+    return _months(ctx, year, month)
+
+def _units_back(ctx: _Context, unit: str, count: int) -> datetime.date:
+    if unit == "day":
+        return ctx.today - datetime.timedelta(days=count)
+    if unit == "week":
+        return ctx.today - datetime.timedelta(weeks=count)
+    if unit == "month":
+        year, month = _shift_month(ctx.today.year, ctx.today.month, -count)
+        return _safe_date(year, month, ctx.today.day)
+    return _safe_date(ctx.today.year - count, ctx.today.month, ctx.today.day)
+
+def _period(ctx: _Context, unit: str, date: datetime.date):
+    """
+    The calendar day/week/month/year containing `date`.
+    """
+    if unit == "day":
+        return _day(ctx, date)
+    if unit == "week":
+        return _week(ctx, date)
+    if unit == "month":
+        return _months(ctx, date.year, date.month)
+    return _year(ctx, date.year)
+
+def _rolling(ctx: _Context, unit: str, count: int):
+    return _dates(ctx, _units_back(ctx, unit, count), ctx.today + datetime.timedelta(days=1))
+
+# --- Single-expression rules: handler(match, ctx) -> (start, end) or None ---
+
+def _iso_date(m, ctx):
+    try:
+        return _day(ctx, datetime.date(int(m[1]), int(m[2]), int(m[3])))
+    except ValueError:
+        return None
+
+def _birthday(m, ctx):
+    if not ctx.birthday:
+        return None
+    month, day = ctx.birthday
+    return _recent_date(ctx, month, day, year=m[2], strict=m[1] == "last ")
+
+def _holiday(m, ctx):
+    month, day = HOLIDAYS[m[2]]
+    return _recent_date(ctx, month, day, year=m[3], strict=m[1] == "last ")
+
+def _month_day(m, ctx):
+    day = int(m[2])
+    if not 1 <= day <= 31:
+        return None
+    return _recent_date(ctx, _month_number(m[1]), day, year=m[3])
+
+def _day_month(m, ctx):
+    day = int(m[1])
+    if not 1 <= day <= 31:
+        return None
+    return _recent_date(ctx, _month_number(m[2]), day, year=m[3])
+
+def _month_year(m, ctx):
+    return _months(ctx, int(m[2]), _month_number(m[1]))
+
+def _last_month_name(m, ctx):
+    return _recent_month(ctx, _month_number(m[1]), strict=True)
+
+def _month_name(m, ctx):
+    return _recent_month(ctx, _month_number(m[1]))
+
+def _season(m, ctx):
+    qualifier, season, year = m[1], m[2], m[3]
+    if season == "fall" and not (qualifier or year):
+        # "did I fall", not autumn
+        return None
+    start_month, length = SEASONS[season]
+    if year:
+        return _months(ctx, int(year), start_month, length)
+
+    # Most recent season that has started ("this"/"the") or ended ("last")
+    for year in range(ctx.today.year, ctx.today.year - 3, -1):
+        start, end = _months(ctx, year, start_month, length)
+        if (end.date() <= ctx.today) if qualifier == "last " else (start.date() <= ctx.today):
+            return start, end
     return None
+
+def _decade(m, ctx):
+    if m[1]:
+        start_year = int(m[1] + m[2] + "0")
+    else:
+        start_year = 1900 + int(m[3]) * 10
+        if start_year + 100 <= ctx.today.year:
+            start_year += 100
+    return _dates(ctx, datetime.date(start_year, 1, 1), datetime.date(start_year + 10, 1, 1))
+
+def _explicit_year(m, ctx):
+    return _year(ctx, int(m[1]))
+
+def _days_back(days):
+    return lambda m, ctx: _day(ctx, ctx.today - datetime.timedelta(days=days))
+
+def _units_ago(m, ctx):
+    unit = m[2]
+    return _period(ctx, unit, _units_back(ctx, unit, _number(m[1])))
+
+def _units_ago_range(m, ctx):
+    # "between 2 and 5 years ago": from the oldest period to the end of the newest
+    unit = m[3]
+    nearest, furthest = sorted((_number(m[1]), _number(m[2])))
+    return (
+        _period(ctx, unit, _units_back(ctx, unit, furthest))[0],
+        _period(ctx, unit, _units_back(ctx, unit, nearest))[1]
+    )
+
+def _rolling_units(m, ctx):
+    return _rolling(ctx, m[2], _number(m[1]))
+
+def _rolling_unit(m, ctx):
+    return _rolling(ctx, m[1], 1)
+
+def _weekend(m, ctx):
+    # Most recent Saturday, or the one before it for "last weekend" on a weekend
+    saturday = ctx.today - datetime.timedelta(days=(ctx.today.weekday() - 5) % 7)
+    if m[1] == "last " and ctx.today.weekday() >= 5:
+        saturday -= datetime.timedelta(days=7)
+    return _dates(ctx, saturday, saturday + datetime.timedelta(days=2))
+
+def _calendar_period(m, ctx):
+    unit = m[2]
+    if m[1] == "this":
+        return _period(ctx, unit, ctx.today)
+    return _period(ctx, unit, _units_back(ctx, unit, 1))
+
+def _weekday(m, ctx):
+    days_back = (ctx.today.weekday() - WEEKDAYS.index(m[2])) % 7
+    if days_back == 0 and m[1] == "last ":
+        days_back = 7
+    return _day(ctx, ctx.today - datetime.timedelta(days=days_back))
+
+RULES = [
+    (re.compile(rf"\b{YEAR}-(\d{{1,2}})-(\d{{1,2}})\b"), _iso_date),
+    (re.compile(rf"\bmy (last |this )?birthday\b{OF_YEAR}"), _birthday),
+    (re.compile(r"\b(last |this )?(" + "|".join(HOLIDAYS) + rf")\b{OF_YEAR}"), _holiday),
+    (re.compile(rf"\b{MONTH} {DAY}\b(?:,? {YEAR}\b)?"), _month_day),
+    (re.compile(rf"\b{DAY} (?:of )?{MONTH}\b(?:,? {YEAR}\b)?"), _day_month),
+    (re.compile(rf"\b{MONTH},? (?:of |in )?{YEAR}\b"), _month_year),
+    (re.compile(rf"\blast {MONTH}\b"), _last_month_name),
+    (re.compile(rf"\b(?:in|during|this|of|since|before|after|until|early|late|mid) {MONTH}\b"), _month_name),
+    (re.compile(r"\b(last |this |the )?(spring|summer|autumn|fall|winter)\b" + OF_YEAR), _season),
+    (re.compile(r"\bthe (?:(19|20)(\d)0|'?(\d)0)'?s\b"), _decade),
+    (re.compile(rf"\b{YEAR_CONTEXT} (?:the year )?{YEAR}\b(?![-/]\d)"), _explicit_year),
+    (re.compile(r"\b(?:the )?day before yesterday\b"), _days_back(2)),
+    (re.compile(r"\b(?:yesterday|last night)\b"), _days_back(1)),
+    (re.compile(r"\b(?:today|tonight|this (?:morning|afternoon|evening))\b"), _days_back(0)),
+    (re.compile(rf"\b{NUMBER}(?: and | to | or | ?- ?){NUMBER} {UNIT} ago\b"), _units_ago_range),
+    (re.compile(rf"\b{NUMBER} {UNIT} ago\b"), _units_ago),
+    (re.compile(rf"\b(?:the )?(?:last|past) {NUMBER} {UNIT}\b"), _rolling_units),
+    (re.compile(r"\b(?:the (?:last|past)|past) (day|week|month|year)\b"), _rolling_unit),
+    (re.compile(r"\b(?:recently|lately|these days)\b"), lambda m, ctx: _rolling(ctx, "day", 30)),
+    (re.compile(r"\b(last |this )?weekend\b"), _weekend),
+    (re.compile(r"\b(last|this|previous) (week|month|year)\b"), _calendar_period),
+    (re.compile(rf"\b(last |this |on |past )?{WEEKDAY}\b"), _weekday),
+]
+
+# --- Range rules: two expressions, or one with an open end ---
+
+RANGE_RULES = [
+    (re.compile(r"\bbetween (.+?) and (.+)"), "between"),
+    (re.compile(r"\bfrom (.+?) (?:to|until|till|through) (.+)"), "between"),
+    (re.compile(r"\bsince (.+)"), "since"),
+    (re.compile(r"\bafter (.+)"), "after"),
+    (re.compile(r"(?<!day )\bbefore (.+)"), "before"),
+    (re.compile(r"\b(?:until|till) (.+)"), "until"),
+]
+
+def _match_single(text: str, ctx: _Context, anchored: bool = False):
+    for pattern, handler in RULES:
+        match = pattern.search(text)
+        # Anchored: the expression must open the text (after its "in " prefix)
+        if match and not (anchored and match.start() > 3):
+            try:
+                resolved = handler(match, ctx)
+            except (ValueError, OverflowError):
+                # Out of the calendar's range ("3000 years ago"): not a usable filter
+                resolved = None
+            if resolved:
+                return resolved
+    return None
+
+def _match_range(text: str, ctx: _Context):
+    for pattern, kind in RANGE_RULES:
+        match = pattern.search(text)
+        if not match:
+            continue
+        # Parts are resolved as if they followed "in", so bare month names work
+        parts = [_match_single(f"in {part}", ctx, anchored=True) for part in match.groups()]
+        if not all(parts):
+            continue
+        if kind == "between":
+            return parts[0][0], parts[1][1]
+        if kind == "since":
+            return parts[0][0], None
+        if kind == "after":
+            return parts[0][1], None
+        if kind == "before":
+            return None, parts[0][0]
+        return None, parts[0][1]
+    return None
+
+def _apply_part_of_day(text: str, start, end, ctx: _Context):
+    """
+    Narrows a single-day range to a part of the day ("last Sunday morning").
+    """
+    match = _PART_OF_DAY.search(text)
+    if not match or start is None or end is None or (end.date() - start.date()).days != 1:
+        return start, end
+    first_hour, last_hour = PARTS_OF_DAY[match[1]]
+    # Wall-clock arithmetic, so DST changes do not shift the window
+    return start + datetime.timedelta(hours=first_hour), start + datetime.timedelta(hours=last_hour)
+
+def parse_time_range(query: str, timezone=None, now: datetime.datetime = None, birthday=None):
+    """
+    Resolves the time expression in a query to a datetime range.
+
+    Returns:
+        (start, end) aware datetimes in the patient's time zone, either of
+        which may be None for open ranges ("since March"), or None if the
+        query mentions no time
+    """
+    text = " ".join(query.lower().replace("’", "'").split())
+    if not _TRIGGER.search(text):
+        return None
+    text = re.sub(r"(\w)'s\b", r"\1s", text)
+
+    tz = resolve_timezone(timezone)
+    now = now.astimezone(tz) if now else datetime.datetime.now(tz)
+    ctx = _Context(now, _parse_birthday(birthday))
+
+    try:
+        resolved = _match_range(text, ctx) or _match_single(text, ctx)
+        if not resolved:
+            return None
+        return _apply_part_of_day(text, *resolved, ctx)
+    except (ValueError, OverflowError):
+        return None
+
+def parse_time_filter(query: str, timezone=None, now: datetime.datetime = None, birthday=None):
+    """
+    Extracts a time filter from a query.
+    Returns a dictionary suitable for Qdrant range filter or None.
+
+    Understands absolute dates ("March 5th, 2019", "last March", "in 2019",
+    "the 90s"), relative ones ("two weeks ago", "2 to 5 years ago", "the
+    past 3 days", "last Sunday"), holidays and the patient's birthday, seasons, ranges ("between
+    March and May", "since last week") and parts of the day ("yesterday
+    evening"), resolved in the patient's time zone.
+
+    Args:
+        query: User query string
+        timezone: IANA time zone name of the patient (default: LIFELENS_TIMEZONE, else server time)
+        now: Reference time (default: now)
+        birthday: Patient's birthday as "YYYY-MM-DD" or "MM-DD", for "my birthday"
+    """
+    resolved = parse_time_range(query, timezone=timezone, now=now, birthday=birthday)
+    if not resolved:
+        return None
+
+    start, end = resolved
+    time_range = {}
+    if start is not None:
+        time_range["gte"] = int(start.timestamp())
+    if end is not None:
+        time_range["lt"] = int(end.timestamp())
+    return {"timestamp": time_range}
@@ -0,0 +1,163 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+import httpx
+from groq import Groq, APIConnectionError, APITimeoutError
+from lifelens.config import (
+    GROQ_API_KEY, GEMINI_API_KEY, AI_TIMEOUT_SECONDS, AI_MAX_RETRIES,
+    AI_RETRY_BASE_DELAY, AI_RETRY_MAX_DELAY, AI_CONCURRENCY
+)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_semaphores = {provider: threading.BoundedSemaphore(limit) for provider, limit in AI_CONCURRENCY.items()}
+
+_groq_client = None
+_gemini_models = {}
+_gemini_configured = False
+_clients_lock = threading.Lock()
+
+def get_groq_client() -> Groq:
+    """
+    Returns the process-wide Groq client.
+    Its HTTP connection pool is sized to the Groq concurrency limit, so
+    connections (and their TLS sessions) are reused across calls.
+    Retries are handled by call_with_retries, not by the SDK.
+    """
+    global _groq_client
+    with _clients_lock:
+        if _groq_client is None:
+            if not GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY is not set.")
+            limit = AI_CONCURRENCY["groq"]
+            _groq_client = Groq(
+                api_key=GROQ_API_KEY,
+                timeout=AI_TIMEOUT_SECONDS,
+                max_retries=0,
+                http_client=httpx.Client(
+                    timeout=AI_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+                )
+            )
+    return _groq_client
+
+def get_gemini():
+    """
+    Returns the google.generativeai module, configured once per process.
+    """
+    global _gemini_configured
+    import google.generativeai as genai
+
+    with _clients_lock:
+        if not _gemini_configured:
+            if not GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY is not set.")
+            genai.configure(api_key=GEMINI_API_KEY)
+            _gemini_configured = True
+    return genai
+
+def get_gemini_model(model_name: str):
+    """
+    Returns a shared GenerativeModel for `model_name`.
+    """
+    genai = get_gemini()
+    with _clients_lock:
+        if model_name not in _gemini_models:
+            _gemini_models[model_name] = genai.GenerativeModel(model_name)
+        return _gemini_models[model_name]
+
+def gemini_request_options(timeout: float = AI_TIMEOUT_SECONDS) -> dict:
+    """
+    Per-request options for Gemini calls: our timeout, and no SDK-level
+    retries on top of call_with_retries.
+    """
+    return {"timeout": timeout, "retry": None}
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for rate limiting, server errors, timeouts and dropped connections.
+    """
+    if isinstance(error, (APIConnectionError, httpx.TransportError)):
+        return True
+    # Groq errors carry status_code, google.api_core errors carry code
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    try:
+        return int(status) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+def is_timeout(error: Exception) -> bool:
+    """
+    True if the request ran out of time (APITimeoutError is an APIConnectionError).
+    """
+    return isinstance(error, (APITimeoutError, httpx.TimeoutException))
+
+def request_timeout(kwargs: dict) -> float:
+    """
+    The timeout a call was made with: Groq's `timeout` argument, Gemini's
+    `request_options` timeout, or the client default.
+    """
+    timeout = kwargs.get("timeout") or (kwargs.get("request_options") or {}).get("timeout")
+    try:
+        return float(timeout)
+    except (TypeError, ValueError):
+        return AI_TIMEOUT_SECONDS
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's
+    Retry-After if it sent one, otherwise full-jitter exponential backoff.
+    """
+    response = getattr(error, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), AI_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * (2 ** attempt)))
+
+@contextmanager
+def provider_slot(provider: str):
+    """
+    Holds one of the provider's concurrency slots.
+    """
+    with _semaphores[provider]:
+        yield
+
+def _call(provider: str, fn, args, kwargs, acquire: bool):
+    for attempt in range(AI_MAX_RETRIES + 1):
+        try:
+            if acquire:
+                with provider_slot(provider):
+                    return fn(*args, **kwargs)
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= AI_MAX_RETRIES or not is_retryable(e):
+                raise
+            # A call given a longer timeout (e.g. a Whisper upload) that still timed
+            # out would block its job for that long again on every retry
+            if is_timeout(e) and request_timeout(kwargs) > AI_TIMEOUT_SECONDS:
+                raise
+            delay = retry_delay(e, attempt)
+            logging.warning(f"{provider} call failed ({e}), retry {attempt + 1}/{AI_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+
+def call_with_retries(provider: str, fn, *args, **kwargs):
+    """
+    Calls `fn(*args, **kwargs)` within the provider's concurrency limit,
+    retrying retryable failures. The slot is released while backing off.
+    """
+    return _call(provider, fn, args, kwargs, acquire=True)
+
+def stream_with_retries(provider: str, fn, *args, **kwargs):
+    """
+    Like call_with_retries for streaming calls: yields the items of the
+    stream returned by `fn`. Only opening the stream is retried, and the
+    concurrency slot is held until the stream is exhausted or closed.
+    """
+    with provider_slot(provider):
+        stream = _call(provider, fn, args, kwargs, acquire=False)
+        yield from stream
@@ -1,5 +1,5 @@
-from groq import Groq
 from lifelens.config import GROQ_API_KEY
+from lifelens.utils.ai_clients import get_groq_client, call_with_retries
 from datetime import datetime, timedelta
 
 def generate_ai_prompts(recent_memories, last_upload_time):
@@ -37,13 +37,13 @@ def generate_ai_prompts(recent_memories, last_upload_time):
     # LLM-generated contextual prompt
     if GROQ_API_KEY and recent_memories:
         try:
-            client = Groq(api_key=GROQ_API_KEY)
-            
             # Summarize recent activity
             summary = f"Recent memories: {len(recent_memories)} items. "
             summary += f"Types: {', '.join(set([m.get('type') for m in recent_memories[:5]]))}"
             
-            completion = client.chat.completions.create(
+            completion = call_with_retries(
+                "groq",
+                get_groq_client().chat.completions.create,
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": "Generate a warm, encouraging prompt for a dementia patient to upload a new memory. Keep it under 20 words."},
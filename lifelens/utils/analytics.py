@@ -1,5 +1,6 @@
 from qdrant_client import QdrantClient
 from lifelens.config import QDRANT_COLLECTION_NAME
+from lifelens.qdrant.filters import patient_memories_filter
 from datetime import datetime, timedelta
 from collections import Counter
 import pandas as pd
@@ -13,7 +14,7 @@ def get_memory_stats(client: QdrantClient, patient_id: str):
         limit=1000,
         with_payload=True,
         with_vectors=False,
-        scroll_filter={"must": [{"key": "patient_id", "match": {"value": patient_id}}]}
+        scroll_filter=patient_memories_filter(patient_id)
     )[0]
     
     if not results:
@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import io
+import logging
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+from lifelens.config import BLOB_STORE_BACKEND, BLOB_STORE_DIR
+
+
+class BlobStore:
+    """
+    Interface for content-addressed media storage.
+    Blobs are immutable and addressed by the SHA-256 of their bytes.
+    """
+
+    def put(self, data: bytes) -> str:
+        raise NotImplementedError
+
+    def get(self, sha256: str) -> bytes:
+        raise NotImplementedError
+
+    def exists(self, sha256: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, sha256: str):
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores blobs on the local filesystem, sharded by hash prefix:
+    <root>/ab/cd/abcd1234...
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def put(self, data: bytes) -> str:
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._path(sha256)
+        if os.path.exists(path):
+            return sha256
+
+        shard_dir = os.path.dirname(path)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        # Write to a temp file in the same shard, then rename so readers
+        # never observe a partially written blob.
+        fd, temp_path = tempfile.mkstemp(dir=shard_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return sha256
+
+    @contextmanager
+    def open(self, sha256: str):
+        """
+        Yields a read-only memory map of the blob (or empty bytes for an empty blob).
+        The map is only valid inside the with-block.
+        """
+        with open(self._path(sha256), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def get(self, sha256: str) -> bytes:
+        with self.open(sha256) as mm:
+            return bytes(mm)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self._path(sha256))
+
+    def delete(self, sha256: str):
+        path = self._path(sha256)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+_BACKENDS = {
+    "local": lambda: LocalBlobStore(BLOB_STORE_DIR),
+}
+
+_store = None
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Returns the process-wide blob store selected by BLOB_STORE_BACKEND.
+    """
+    global _store
+    if _store is None:
+        if BLOB_STORE_BACKEND not in _BACKENDS:
+            raise ValueError(f"Unknown blob store backend: {BLOB_STORE_BACKEND}")
+        _store = _BACKENDS[BLOB_STORE_BACKEND]()
+    return _store
+
+
+def store_media(data: bytes, mime_type: str) -> dict:
+    """
+    Saves media bytes to the blob store and returns the reference kept in the payload:
+    hash, MIME type, byte size and (for images) pixel dimensions.
+    """
+    sha256 = get_blob_store().put(data)
+    ref = {
+        "sha256": sha256,
+        "mime_type": mime_type,
+        "size": len(data)
+    }
+
+    if mime_type.startswith("image/"):
+        try:
+            from PIL import Image
+            # Only reads the header, the pixels are not decoded
+            with Image.open(io.BytesIO(data)) as image:
+                ref["width"], ref["height"] = image.size
+        except Exception as e:
+            logging.warning(f"Could not read image dimensions: {e}")
+
+    return ref
+
+
+def load_media_bytes(memory: dict, rendition: str = None):
+    """
+    Returns the raw media bytes for a memory payload, or None if it has no media.
+    If `rendition` (e.g. "thumb", "display") is given and was produced at ingest,
+    that smaller copy is returned instead of the original.
+    Falls back to inline base64 for memories stored before the blob store existed.
+    """
+    media = memory.get("media")
+    if media:
+        if rendition and rendition in media.get("renditions", {}):
+            media = media["renditions"][rendition]
+        try:
+            return get_blob_store().get(media["sha256"])
+        except FileNotFoundError:
+            logging.error(f"Blob {media['sha256']} is missing from the blob store")
+            return None
+
+    inline = memory.get("source_image_base64") or memory.get("source_audio_base64")
+    if inline:
+        return base64.b64decode(inline)
+    return None
+
+
+def media_mime_type(memory: dict, default: str = None, rendition: str = None):
+    """
+    Returns the MIME type recorded for a memory's media (or one of its renditions).
+    """
+    media = memory.get("media")
+    if media:
+        if rendition and rendition in media.get("renditions", {}):
+            media = media["renditions"][rendition]
+        return media.get("mime_type", default)
+    return default
@@ -1,10 +1,44 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import base64
+import uuid
 from datetime import datetime
+from lifelens.utils.blob_store import load_media_bytes, media_mime_type
+from lifelens.retrieval.search_engine import fetch_memory_media, MEDIA_PAYLOAD_FIELDS
 
-def display_memory(memory):
+# Players for a spoken answer. The first sentence is tagged with a per-answer
+# token; the rest waits in the browser for that exact element to end, then plays.
+FIRST_CLIP_PLAYER = """
+<audio data-answer-clip="{token}" autoplay controls style="width: 100%"
+       src="data:audio/mp3;base64,{audio}"></audio>
+"""
+QUEUED_AUDIO_PLAYER = """
+<audio id="rest" controls style="width: 100%" src="data:audio/mp3;base64,{audio}"></audio>
+<script>
+  const rest = document.getElementById("rest");
+  let first = null;
+  for (const frame of window.parent.document.querySelectorAll("iframe")) {{
+    try {{
+      first = frame.contentDocument.querySelector('audio[data-answer-clip="{token}"]');
+    }} catch (e) {{
+      // Frames from other origins cannot hold the clip
+    }}
+    if (first) break;
+  }}
+  if (first && !first.ended) {{
+    first.addEventListener("ended", () => rest.play(), {{ once: true }});
+  }} else {{
+    rest.play();
+  }}
+</script>
+"""
+
+def display_memory(memory, client=None):
     """
     Renders a single memory item in Streamlit.
+    Media bytes are read from the blob store via the memory's `media` reference.
+    With a `client`, image and audio memories without one (inline media stored
+    before the blob store existed) have their media fetched by point ID.
     """
     # Convert timestamp to readable format
     timestamp = memory.get('timestamp', 0)
@@ -21,11 +55,16 @@ def display_memory(memory):
         col1, col2 = st.columns([1, 3])
         
         with col1:
-            if memory['type'] == 'image' and memory.get('source_image_base64'):
-                # Decode base64 to display
-                st.image(base64.b64decode(memory['source_image_base64']), use_column_width=True)
-            elif memory['type'] == 'audio':
-                st.audio(base64.b64decode(memory['source_audio_base64']), format='audio/wav')
+            media_source = memory
+            if client and memory.get('id') and memory['type'] in ('image', 'audio') \
+                    and not any(memory.get(field) for field in MEDIA_PAYLOAD_FIELDS):
+                media_source = fetch_memory_media(client, memory['id'])
+
+            media_bytes = load_media_bytes(media_source, rendition="display" if memory['type'] == 'image' else None)
+            if memory['type'] == 'image' and media_bytes:
+                st.image(media_bytes, use_column_width=True)
+            elif memory['type'] == 'audio' and media_bytes:
+                st.audio(media_bytes, format=media_mime_type(media_source, 'audio/wav'))
             elif memory['type'] == 'text':
                 st.markdown("📝 **Note**")
 
@@ -47,11 +86,73 @@ def display_memory(memory):
                 icon = sentiment_colors.get(memory['sentiment'], "⚪")
                 st.markdown(f"{icon} **Mood:** {memory['sentiment']}")
             
+            if memory.get('matched_chunk'):
+                excerpt_at = ""
+                if memory.get('matched_start_ms') is not None:
+                    minutes, seconds = divmod(memory['matched_start_ms'] // 1000, 60)
+                    excerpt_at = f" (at `{minutes:02d}:{seconds:02d}`)"
+                st.markdown(f"**Best match{excerpt_at}:** …{memory['matched_chunk']}…")
             if memory.get('caption'):
                 st.markdown(f"**Caption:** {memory['caption']}")
-            if memory.get('transcript'):
+            if memory.get('segments'):
+                st.markdown("**Transcript:**")
+                for segment in memory['segments']:
+                    minutes, seconds = divmod(segment['start_ms'] // 1000, 60)
+                    st.markdown(f"`{minutes:02d}:{seconds:02d}` {segment['text']}")
+            elif memory.get('transcript'):
                 st.markdown(f"**Transcript:** {memory['transcript']}")
             if memory.get('content'):
                 st.markdown(f"**Content:** {memory['content']}")
                 
             st.caption(f"Score: {memory.get('score', 0):.4f}")
+
+
+
+class SentenceAudioPlayer:
+    """
+    Plays the clips of a SentenceSpeaker in order: the first clip starts
+    as soon as it is synthesized, the rest follow once it has finished.
+    """
+
+    def __init__(self, speaker):
+        self.speaker = speaker
+        self._first_slot = st.empty()
+        self._rest_slot = st.empty()
+        self._first_started = False
+        self._token = uuid.uuid4().hex
+
+    def poll(self):
+        """
+        Starts the first clip if it is ready. Call while the answer streams.
+        """
+        if not self._first_started and self.speaker.clips and self.speaker.clips[0].done():
+            audio_bytes = self.speaker.clips[0].result()
+            if audio_bytes:
+                with self._first_slot.container():
+                    components.html(FIRST_CLIP_PLAYER.format(
+                        token=self._token, audio=base64.b64encode(audio_bytes).decode("ascii")
+                    ), height=60)
+                self._first_started = True
+
+    def stop(self):
+        """
+        Removes the first clip's player, stopping it if it is playing
+        (e.g. when the answer failed midway).
+        """
+        self._first_slot.empty()
+
+    def finish(self):
+        """
+        Waits for the remaining clips to be synthesized and queues them as one
+        player that starts in the browser when the first clip has ended.
+        """
+        self.poll()
+        clips = self.speaker.clips[1:] if self._first_started else self.speaker.clips
+        # gTTS clips share one MP3 format, so their frames can be joined directly
+        rest = b"".join(clip.result() or b"" for clip in clips)
+        if not rest:
+            return
+        with self._rest_slot.container():
+            components.html(QUEUED_AUDIO_PLAYER.format(
+                token=self._token, audio=base64.b64encode(rest).decode("ascii")
+            ), height=60)
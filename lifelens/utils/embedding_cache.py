@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from cachetools import TTLCache
+
+from lifelens.config import (
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_ITEMS,
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text before hashing so trivially different copies of the same
+    note (whitespace, unicode composition) share one cache entry.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model: str, task_type: str, text: str) -> str:
+    """
+    Cache key for an embedding: hash of (model name, task type, normalized text).
+    """
+    raw = f"{model}\x00{task_type}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-process LRU in front of a SQLite table.
+    Vectors are stored on disk as packed float32.
+    """
+
+    def __init__(self, path: str, max_memory_items: int = 4096):
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, task_type TEXT, vector BLOB, created_at INTEGER)"
+        )
+        self._db.commit()
+
+    def _remember(self, key: str, vector: list):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list) -> list:
+        """
+        Looks up vectors for a list of keys. Returns a list aligned with `keys`
+        holding the cached vector or None for a miss.
+        """
+        found = [None] * len(keys)
+        disk_lookups = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[i] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups:
+                lookup_keys = list(disk_lookups)
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(lookup_keys), 500):
+                    batch = lookup_keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        self._remember(key, vector)
+                        for i in disk_lookups.pop(key):
+                            found[i] = vector
+                            self._stats["disk_hits"] += 1
+
+                self._stats["misses"] += sum(len(positions) for positions in disk_lookups.values())
+
+        return found
+
+    def put_many(self, model: str, task_type: str, keys: list, vectors: list):
+        """
+        Stores vectors for the given keys in both cache levels.
+        """
+        now = int(time.time())
+        rows = [
+            (key, model, task_type, array("f", vector).tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, list(vector))
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+                self._db.commit()
+            except sqlite3.Error as e:
+                # The disk layer is an optimization; never fail the caller over it
+                logging.warning(f"Failed to persist embeddings to cache: {e}")
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the number of entries held in memory.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+class QueryEmbeddingCache:
+    """
+    TTL-bounded LRU cache for query vectors.
+    Concurrent lookups of the same key share a single in-flight computation.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def get_or_compute(self, key: str, compute):
+        """
+        Returns the cached value for `key`, waiting on an identical in-flight
+        call if there is one, or else calling `compute()` and caching its result.
+        """
+        with self._lock:
+            if key in self._cache:
+                self._stats["hits"] += 1
+                return self._cache[key]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = value
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/coalesced counters and the current number of entries.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._cache)
+            stats["in_flight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        return stats
+
+
+_query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """
+    Returns the process-wide query embedding cache.
+    """
+    return _query_cache
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Returns the process-wide document embedding cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_ITEMS)
+    return _cache
@@ -0,0 +1,121 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lifelens.config import (
+    EMBEDDING_PROVIDER, EMBEDDING_MODEL, VECTOR_SIZE,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, FASTEMBED_CACHE_DIR
+)
+from lifelens.utils.ai_clients import get_gemini, gemini_request_options, call_with_retries
+
+
+class EmbeddingProvider:
+    """
+    Interface for text embedding backends.
+    Document and query embeddings are separate because some models
+    (Gemini, BGE) embed them differently.
+    """
+
+    model_name = None
+    dimension = None
+    max_batch_size = 1
+
+    def embed_documents(self, texts: list) -> list:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> list:
+        raise NotImplementedError
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """
+    Remote embeddings through the Gemini API, using the shared Gemini client.
+    """
+
+    def __init__(self, model_name: str, dimension: int, max_batch_size: int):
+        self._genai = get_gemini()
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_batch_size = max_batch_size
+
+    def embed_documents(self, texts: list) -> list:
+        vectors = []
+        for start in range(0, len(texts), self.max_batch_size):
+            result = call_with_retries(
+                "gemini",
+                self._genai.embed_content,
+                model=self.model_name,
+                content=texts[start:start + self.max_batch_size],
+                task_type="retrieval_document",
+                request_options=gemini_request_options()
+            )
+            vectors.extend(result['embedding'])
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        result = call_with_retries(
+            "gemini",
+            self._genai.embed_content,
+            model=self.model_name,
+            content=text,
+            task_type="retrieval_query",
+            request_options=gemini_request_options()
+        )
+        return result['embedding']
+
+
+class FastEmbedProvider(EmbeddingProvider):
+    """
+    Local CPU embeddings with FastEmbed (ONNX Runtime).
+    Batches are spread over a thread pool; ONNX Runtime releases the GIL
+    while it runs, so batches embed in parallel.
+    """
+
+    def __init__(self, model_name: str, dimension: int, max_batch_size: int, threads: int):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError(
+                "The 'fastembed' embedding provider requires the fastembed package: pip install fastembed"
+            ) from e
+
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_batch_size = max_batch_size
+        self._model = TextEmbedding(model_name=model_name, cache_dir=FASTEMBED_CACHE_DIR, threads=1)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="fastembed")
+
+    def _embed_batch(self, texts: list) -> list:
+        return [vector.tolist() for vector in self._model.passage_embed(texts, batch_size=len(texts))]
+
+    def embed_documents(self, texts: list) -> list:
+        batches = [texts[start:start + self.max_batch_size] for start in range(0, len(texts), self.max_batch_size)]
+        vectors = []
+        for batch_vectors in self._executor.map(self._embed_batch, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        future = self._executor.submit(lambda: next(iter(self._model.query_embed(text))).tolist())
+        return future.result()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Returns the process-wide embedding provider selected by EMBEDDING_PROVIDER.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if EMBEDDING_PROVIDER == "gemini":
+                _provider = GeminiEmbeddingProvider(EMBEDDING_MODEL, VECTOR_SIZE, EMBEDDING_BATCH_SIZE)
+            elif EMBEDDING_PROVIDER == "fastembed":
+                _provider = FastEmbedProvider(EMBEDDING_MODEL, VECTOR_SIZE, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS)
+            else:
+                raise ValueError(f"Unknown embedding provider: {EMBEDDING_PROVIDER}")
+            logging.info(f"Using {EMBEDDING_PROVIDER} embeddings ({EMBEDDING_MODEL}, {VECTOR_SIZE}-d)")
+    return _provider
@@ -1,5 +1,6 @@
 from datetime import datetime
 import base64
+from lifelens.utils.blob_store import load_media_bytes, media_mime_type
 
 def generate_memory_book_html(memories, patient_name):
     """
@@ -89,8 +90,12 @@ def generate_memory_book_html(memories, patient_name):
             html += '</div>'
         
         # Image
-        if mem.get("source_image_base64"):
-            html += f'<img class="memory-image" src="data:image/jpeg;base64,{mem["source_image_base64"]}" />'
+        if mem.get("type") == "image":
+            image_bytes = load_media_bytes(mem, rendition="display")
+            if image_bytes:
+                image_b64 = base64.b64encode(image_bytes).decode()
+                mime_type = media_mime_type(mem, "image/jpeg", rendition="display")
+                html += f'<img class="memory-image" src="data:{mime_type};base64,{image_b64}" />'
         
         # Caption/Content
         if mem.get("caption"):
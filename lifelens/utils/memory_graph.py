@@ -1,4 +1,14 @@
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from qdrant_client.http import models
+from lifelens.config import QDRANT_COLLECTION_NAME, RELATED_INDEX_REFRESH_SECONDS, RELATED_MIN_SIMILARITY
+from lifelens.qdrant.filters import patient_memories_filter, normalize_person_tags
+from lifelens.retrieval.time_parser import resolve_timezone
+from lifelens.auth.users import get_patient_profile
 
 def find_related_memories(memories, current_memory):
     """
@@ -40,3 +50,265 @@ def find_related_memories(memories, current_memory):
             related.append({"reason": "Around the same time", "memory": mem})
     
     return related[:5]  # Limit to 5 related memories
+
+
+INDEX_PAYLOAD_FIELDS = ["patient_id", "type", "timestamp", "person_tags", "caption", "transcript", "content"]
+
+
+def _summary(payload: dict) -> str:
+    text = payload.get("caption") or payload.get("transcript") or payload.get("content") or ""
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+class _PatientBuckets:
+    def __init__(self, tz):
+        # Days are bucketed in the patient's time zone, like the Ask time filters
+        self.tz = tz
+        self.memories = {}
+        self.by_day = defaultdict(set)
+        self.by_hour = defaultdict(set)
+        self.by_person = defaultdict(set)
+        self.loaded_at = time.monotonic()
+
+
+class RelatedMemoryIndex:
+    """
+    In-memory index of each patient's memories by day, hour and tagged
+    person, so "related to X" lookups are set lookups instead of a scan.
+
+    A patient's buckets are loaded with one paginated scroll on first use
+    and then kept current by add/remove calls from upsert and delete.
+    """
+
+    def __init__(self, refresh_seconds: int = RELATED_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._patients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry(point_id: str, payload: dict, tz=None) -> dict:
+        timestamp = int(payload.get("timestamp", 0))
+        return {
+            "id": str(point_id),
+            "type": payload.get("type"),
+            "timestamp": timestamp,
+            "day": datetime.fromtimestamp(timestamp, tz).date().toordinal(),
+            "hour": timestamp // 3600,
+            "people": normalize_person_tags(payload.get("person_tags")),
+            "person_tags": payload.get("person_tags"),
+            "summary": _summary(payload)
+        }
+
+    @staticmethod
+    def _insert(buckets: _PatientBuckets, entry: dict):
+        buckets.memories[entry["id"]] = entry
+        buckets.by_day[entry["day"]].add(entry["id"])
+        buckets.by_hour[entry["hour"]].add(entry["id"])
+        for person in entry["people"]:
+            buckets.by_person[person].add(entry["id"])
+
+    @staticmethod
+    def _discard(buckets: _PatientBuckets, point_id: str):
+        entry = buckets.memories.pop(point_id, None)
+        if entry is None:
+            return
+        buckets.by_day[entry["day"]].discard(point_id)
+        buckets.by_hour[entry["hour"]].discard(point_id)
+        for person in entry["people"]:
+            buckets.by_person[person].discard(point_id)
+
+    def _load(self, client, patient_id: str) -> _PatientBuckets:
+        buckets = _PatientBuckets(resolve_timezone(get_patient_profile(patient_id)["timezone"]))
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=QDRANT_COLLECTION_NAME,
+                scroll_filter=patient_memories_filter(patient_id),
+                limit=256,
+                offset=offset,
+                with_payload=INDEX_PAYLOAD_FIELDS,
+                with_vectors=False
+            )
+            for point in points:
+                self._insert(buckets, self._entry(point.id, point.payload, buckets.tz))
+            if offset is None:
+                break
+        return buckets
+
+    def _buckets(self, client, patient_id: str) -> _PatientBuckets:
+        with self._lock:
+            buckets = self._patients.get(patient_id)
+        if buckets is None or time.monotonic() - buckets.loaded_at > self.refresh_seconds:
+            buckets = self._load(client, patient_id)
+            with self._lock:
+                self._patients[patient_id] = buckets
+        return buckets
+
+    def add(self, point_id: str, payload: dict):
+        """
+        Indexes a new or updated memory (no-op until its patient is loaded).
+        """
+        if payload.get("is_chunk"):
+            return
+        with self._lock:
+            buckets = self._patients.get(payload.get("patient_id"))
+            if buckets is not None:
+                self._discard(buckets, str(point_id))
+                self._insert(buckets, self._entry(point_id, payload, buckets.tz))
+
+    def remove(self, point_id: str):
+        """
+        Drops a deleted memory from whichever patient it belongs to.
+        """
+        with self._lock:
+            for buckets in self._patients.values():
+                self._discard(buckets, str(point_id))
+
+    def invalidate(self, patient_id: str = None):
+        """
+        Forgets one patient's buckets (or all), so they are reloaded on next use.
+        """
+        with self._lock:
+            if patient_id is None:
+                self._patients.clear()
+            else:
+                self._patients.pop(patient_id, None)
+
+    def related(self, client, patient_id: str, memory: dict, limit: int = 5) -> list:
+        """
+        Finds memories related to `memory`, in order of:
+        - Same day
+        - Same people tagged
+        - Similar timestamps (within 1 hour)
+
+        Returns:
+            List of {"reason", "memory"} dicts, `memory` being the indexed entry
+        """
+        buckets = self._buckets(client, patient_id)
+        current = self._entry(memory.get("id", ""), memory, buckets.tz)
+        related = []
+
+        def add(point_ids, reason):
+            # Only the `limit` closest in time are needed, not a full sort
+            remaining = limit - len(related)
+            if remaining <= 0:
+                return
+            closest = heapq.nsmallest(
+                remaining,
+                (pid for pid in point_ids if pid not in seen),
+                key=lambda pid: abs(buckets.memories[pid]["timestamp"] - current["timestamp"])
+            )
+            for point_id in closest:
+                seen.add(point_id)
+                related.append({"reason": reason(point_id), "memory": buckets.memories[point_id]})
+
+        with self._lock:
+            if current["id"]:
+                seen = {current["id"]}
+            else:
+                # Payload without an ID: skip itself by timestamp
+                seen = {
+                    pid for pid in buckets.by_hour.get(current["hour"], ())
+                    if buckets.memories[pid]["timestamp"] == current["timestamp"]
+                }
+            add(buckets.by_day.get(current["day"], ()), lambda _: "Same day")
+            for person in current["people"]:
+                add(buckets.by_person.get(person, ()), lambda pid: "Same person: " + ", ".join(
+                    p.title() for p in current["people"] if p in buckets.memories[pid]["people"]
+                ))
+            nearby = set()
+            for hour in (current["hour"] - 1, current["hour"], current["hour"] + 1):
+                nearby.update(
+                    pid for pid in buckets.by_hour.get(hour, ())
+                    if abs(buckets.memories[pid]["timestamp"] - current["timestamp"]) < 3600
+                )
+            add(nearby, lambda _: "Around the same time")
+
+        return related[:limit]
+
+
+_related_index = RelatedMemoryIndex()
+
+
+def get_related_memory_index() -> RelatedMemoryIndex:
+    """
+    Returns the process-wide related-memory index.
+    """
+    return _related_index
+
+
+def find_similar_memories(client, patient_id: str, point_ids: list, limit: int = 3) -> dict:
+    """
+    Nearest neighbours of several stored memories, using their stored
+    vectors (no re-embedding), in one batched Qdrant request.
+    Memories in `point_ids` are never returned as neighbours of each other.
+
+    Returns:
+        Dict of point ID -> list of (score, indexed entry)
+    """
+    if not point_ids:
+        return {}
+
+    exclude = models.Filter(
+        must=[models.FieldCondition(key="patient_id", match=models.MatchValue(value=patient_id))],
+        must_not=[
+            models.FieldCondition(key="is_chunk", match=models.MatchValue(value=True)),
+            models.HasIdCondition(has_id=list(point_ids))
+        ]
+    )
+    responses = client.query_batch_points(
+        collection_name=QDRANT_COLLECTION_NAME,
+        requests=[
+            models.QueryRequest(
+                query=point_id,
+                filter=exclude,
+                limit=limit,
+                score_threshold=RELATED_MIN_SIMILARITY,
+                with_payload=INDEX_PAYLOAD_FIELDS
+            )
+            for point_id in point_ids
+        ]
+    )
+    return {
+        point_id: [(point.score, RelatedMemoryIndex._entry(point.id, point.payload)) for point in response.points]
+        for point_id, response in zip(point_ids, responses)
+    }
+
+
+def related_for_results(client, patient_id: str, memories: list, limit: int = 3) -> dict:
+    """
+    Related memories for a whole page of search results: the index's
+    same day / same person / same hour matches combined with vector
+    similarity, which costs one Qdrant round trip for the page.
+
+    Returns:
+        Dict of point ID -> list of {"reason", "memory"} dicts
+    """
+    index = get_related_memory_index()
+    point_ids = [memory["id"] for memory in memories if memory.get("id")]
+
+    try:
+        similar = find_similar_memories(client, patient_id, point_ids, limit=limit)
+    except Exception as e:
+        logging.warning(f"Similar memory lookup failed: {e}")
+        similar = {}
+
+    related_by_id = {}
+    for memory in memories:
+        if not memory.get("id"):
+            continue
+        related = index.related(client, patient_id, memory, limit=limit)
+        by_related_id = {rel["memory"]["id"]: rel for rel in related}
+
+        for score, entry in similar.get(memory["id"], []):
+            if entry["id"] in by_related_id:
+                rel = by_related_id[entry["id"]]
+                rel["reason"] += " · Similar content"
+            else:
+                related.append({"reason": "Similar content", "memory": entry, "score": score})
+
+        # Memories related in more than one way first
+        related.sort(key=lambda rel: " · " not in rel["reason"])
+        related_by_id[memory["id"]] = related[:limit]
+
+    return related_by_id
@@ -1,5 +1,5 @@
-from groq import Groq
 from lifelens.config import GROQ_API_KEY
+from lifelens.utils.ai_clients import get_groq_client, call_with_retries
 import json
 import os
 
@@ -14,12 +14,25 @@ def load_reminders():
             return []
     return []
 
-def save_reminder(reminder):
+def save_reminder(reminder, source=None):
+    """
+    Appends a reminder to the reminders file. A reminder tagged with a
+    `source` (e.g. the note it came from) is saved only once, so a retried
+    ingestion job does not add it again.
+    """
     reminders = load_reminders()
+    if source is not None:
+        if any(saved.get("source") == source for saved in reminders):
+            return
+        reminder = {**reminder, "source": source}
     reminders.append(reminder)
     with open(REMINDERS_FILE, "w") as f:
         json.dump(reminders, f)
 
+    # Have the spoken reminder ready before it is first played
+    from lifelens.utils.tts import warm_up_in_background, reminder_phrase
+    warm_up_in_background([reminder_phrase(reminder)])
+
 def extract_reminder(text):
     """
     Uses LLM to check if the text contains a future task.
@@ -28,8 +41,6 @@ def extract_reminder(text):
     if not GROQ_API_KEY:
         return None
         
-    client = Groq(api_key=GROQ_API_KEY)
-    
     prompt = f"""
     Analyze the following text. Does it contain a future task, appointment, or reminder?
     If yes, return a JSON object with keys "task" (short description) and "time" (when it is due).
@@ -41,7 +52,9 @@ def extract_reminder(text):
     """
     
     try:
-        completion = client.chat.completions.create(
+        completion = call_with_retries(
+            "groq",
+            get_groq_client().chat.completions.create,
             model="llama-3.3-70b-versatile",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that extracts reminders to JSON."},
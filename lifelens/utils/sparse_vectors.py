@@ -0,0 +1,50 @@
+import re
+import zlib
+from collections import Counter
+from qdrant_client.http import models
+
+# BM25 term-frequency saturation. IDF is applied by Qdrant at query time
+# (the sparse vector is configured with the IDF modifier).
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_DOC_WORDS = 60
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "did", "do", "for", "from",
+    "had", "has", "have", "he", "her", "his", "i", "in", "is", "it", "me", "my", "of",
+    "on", "or", "our", "she", "that", "the", "their", "them", "they", "this", "to",
+    "was", "we", "were", "what", "when", "where", "which", "who", "with", "you", "your"
+}
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased alphanumeric terms, without stopwords and single characters.
+    """
+    return [
+        token for token in re.findall(r"[a-z0-9]+", text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+def _term_index(term: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(term.encode("utf-8"))
+
+def sparse_document_vector(text: str) -> models.SparseVector:
+    """
+    BM25 document-side term weights of a memory text as a sparse vector.
+    """
+    counts = Counter(tokenize(text))
+    length_norm = 1 - BM25_B + BM25_B * sum(counts.values()) / BM25_AVG_DOC_WORDS
+
+    weights = {}
+    for term, tf in counts.items():
+        index = _term_index(term)
+        weights[index] = weights.get(index, 0.0) + tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+    return models.SparseVector(indices=list(weights), values=list(weights.values()))
+
+def sparse_query_vector(text: str) -> models.SparseVector:
+    """
+    Query-side sparse vector: each distinct query term with weight 1.
+    """
+    indices = sorted({_term_index(term) for term in tokenize(text)})
+    return models.SparseVector(indices=indices, values=[1.0] * len(indices))
@@ -1,20 +1,153 @@
+"""
+Text-to-speech with gTTS, backed by an on-disk clip cache.
+
+Usage (pre-synthesize saved reminders):
+    python -m lifelens.utils.tts warm
+"""
 from gtts import gTTS
+import argparse
 import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from lifelens.config import TTS_WORKERS, TTS_MIN_SENTENCE_CHARS, TTS_LANG, TTS_TLD
+from lifelens.utils.tts_cache import get_speech_cache, speech_key
+from lifelens.utils.logging import setup_logging
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+# Warm-up gets its own thread, so a long reminders list never takes answer TTS workers
+_warm_up_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-warm-up")
 
-def text_to_speech(text):
+def text_to_speech(text, lang=TTS_LANG, tld=TTS_TLD, slow=False):
     """
     Converts text to speech using gTTS and returns the audio bytes.
+    Clips already synthesized with the same voice and speed come from the cache.
     """
     if not text:
         return None
     
+    cache = get_speech_cache()
+    key = speech_key(text, lang, tld, slow)
+    cached = cache.get(key)
+    if cached is not None:
+        return io.BytesIO(cached)
+    
     try:
-        # Use 'com' tld for US English, fast speed False for clarity
-        tts = gTTS(text=text, lang='en', tld='com', slow=False)
+        tts = gTTS(text=text, lang=lang, tld=tld, slow=slow)
         audio_fp = io.BytesIO()
         tts.write_to_fp(audio_fp)
+        cache.put(key, audio_fp.getvalue())
         audio_fp.seek(0)
         return audio_fp
     except Exception as e:
         print(f"TTS Error: {e}")
         return None
+
+
+def _synthesize(text):
+    audio_fp = text_to_speech(text)
+    return audio_fp.getvalue() if audio_fp else None
+
+
+class SentenceSpeaker:
+    """
+    Speaks a streamed answer sentence by sentence: text is fed in as it
+    arrives and every completed sentence is synthesized in the background,
+    so the first sentence can play while the rest is still being generated.
+    """
+
+    def __init__(self, min_chars: int = TTS_MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.clips = []
+        self._buffer = ""
+
+    def _speak(self, text):
+        text = text.strip()
+        if text:
+            self.clips.append(_executor.submit(_synthesize, text))
+
+    def feed(self, delta: str):
+        """
+        Adds streamed text and queues any sentences it completes.
+        """
+        self._buffer += delta
+        parts = _SENTENCE_BOUNDARY.split(self._buffer)
+        pending = ""
+        # The last part is not known to be complete yet
+        for part in parts[:-1]:
+            pending = f"{pending} {part}" if pending else part
+            if len(pending) >= self.min_chars:
+                self._speak(pending)
+                pending = ""
+        self._buffer = f"{pending} {parts[-1]}" if pending else parts[-1]
+
+    def finish(self):
+        """
+        Queues whatever text remains once the stream has ended.
+        """
+        self._speak(self._buffer)
+        self._buffer = ""
+
+    def audio(self) -> bytes:
+        """
+        All clips joined into one MP3 (waits for synthesis to finish).
+        """
+        return b"".join(clip.result() or b"" for clip in self.clips)
+
+
+def reminder_phrase(reminder: dict) -> str:
+    """
+    The sentence spoken for a saved reminder.
+    """
+    phrase = f"Reminder: {reminder.get('task')}."
+    if reminder.get("time"):
+        phrase += f" {reminder['time']}."
+    return phrase
+
+def recurring_phrases() -> list:
+    """
+    Phrases spoken again and again: every saved reminder.
+    """
+    from lifelens.utils.reminders import load_reminders
+
+    phrases = [reminder_phrase(reminder) for reminder in load_reminders() if reminder.get("task")]
+    return list(dict.fromkeys(phrases))
+
+def warm_up(phrases: list = None) -> int:
+    """
+    Synthesizes any of `phrases` (default: recurring_phrases()) that are not
+    cached yet, so they later play without a synthesis round trip.
+
+    Returns:
+        Number of phrases synthesized
+    """
+    if phrases is None:
+        phrases = recurring_phrases()
+    cache = get_speech_cache()
+    missing = [phrase for phrase in phrases if not cache.contains(speech_key(phrase, TTS_LANG, TTS_TLD, False))]
+    synthesized = sum(1 for phrase in missing if _synthesize(phrase))
+    if missing:
+        logging.info(f"Pre-synthesized {synthesized}/{len(missing)} recurring phrases")
+    return synthesized
+
+def warm_up_in_background(phrases: list = None):
+    """
+    Runs warm_up on the dedicated warm-up thread without waiting for it.
+    """
+    return _warm_up_executor.submit(warm_up, phrases)
+
+def main():
+    parser = argparse.ArgumentParser(description="LifeLens text-to-speech cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("warm", help="Pre-synthesize saved reminders")
+    args = parser.parse_args()
+
+    setup_logging()
+
+    if args.command == "warm":
+        count = warm_up()
+        print(f"Synthesized {count} phrases; cache holds {get_speech_cache().stats()['bytes'] / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from lifelens.config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+from lifelens.utils.embedding_cache import normalize_text
+
+
+def speech_key(text: str, lang: str, tld: str, slow: bool) -> str:
+    """
+    Cache key for synthesized speech: hash of (voice, speed, normalized text).
+    """
+    raw = f"{lang}\x00{tld}\x00{int(slow)}\x00{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """
+    Content-addressed on-disk cache of MP3 clips: <root>/ab/<key>.mp3.
+    A file's modification time records when it was last played, so once the
+    cache grows past `max_bytes` the least recently played clips are evicted.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._size = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def _files(self) -> list:
+        files = []
+        for shard, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".mp3"):
+                    path = os.path.join(shard, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _total_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._files())
+        return self._size
+
+    def get(self, key: str):
+        """
+        Returns the cached clip, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return data
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes):
+        """
+        Stores a clip, evicting least recently played clips if the cache is full.
+        """
+        path = self._path(key)
+        shard_dir = os.path.dirname(path)
+        try:
+            os.makedirs(shard_dir, exist_ok=True)
+            existed = os.path.exists(path)
+            # Temp file + rename, so a concurrent reader never sees half a clip
+            fd, temp_path = tempfile.mkstemp(dir=shard_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            # The cache is an optimization; never fail the caller over it
+            logging.warning(f"Failed to cache speech clip: {e}")
+            return
+
+        with self._lock:
+            if not existed:
+                self._size = self._total_size() + len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Down to 90% so eviction does not rescan the directory on every put
+        target = self.max_bytes * 0.9
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._stats["evictions"] += 1
+        self._size = total
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/eviction counters and the cache size in bytes.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._total_size()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = SpeechCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024)
+
+
+def get_speech_cache() -> SpeechCache:
+    """
+    Returns the process-wide speech cache.
+    """
+    return _cache